@@ -75,11 +75,23 @@ WSGI_APPLICATION = "course_searcher.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+SQLITE_OPTIONS = {
+    "timeout": 30,
+    "transaction_mode": "IMMEDIATE",
+    "init_command": "PRAGMA journal_mode=WAL;",
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "OPTIONS": SQLITE_OPTIONS,
+    },
+    "staging": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.staging.sqlite3",
+        "OPTIONS": SQLITE_OPTIONS,
+    },
 }
 
 
@@ -121,4 +133,6 @@ STATICFILES_DIRS = [
 MEDIA_ROOT = BASE_DIR / "media"
 MEDIA_URL = "media/"
 
+STEPIK_CACHE_DIR = BASE_DIR / ".stepik_cache"
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -1,11 +1,26 @@
 from django.contrib import admin
 from django.urls import path
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib import messages
 from django.core.management import call_command
+from django.db import connection
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_POST
 import threading
 
-from .models import Category, CourseList, StepikUser, Course, Review
+from .models import (
+    Category,
+    CourseList,
+    StepikUser,
+    Course,
+    Review,
+    FailedRequest,
+    CrawlRun,
+    CrawlTask,
+)
+from .checkpoints import acquire_run, CrawlLocked
+from .metrics import HISTOGRAM_LABELS
 
 
 @admin.register(Category)
@@ -31,7 +46,7 @@ class CourseListAdmin(admin.ModelAdmin):
         "created_at",
     ]
     search_fields = ["title", "description", "external_id"]
-    list_filter = ["category", "created_at"]
+    list_filter = ["category", "created_at", "removed_at"]
     readonly_fields = ["created_at", "updated_at"]
     autocomplete_fields = ["category"]
 
@@ -52,7 +67,13 @@ class StepikUserAdmin(admin.ModelAdmin):
     ]
     search_fields = ["full_name", "bio", "external_id"]
     list_filter = ["created_at"]
-    readonly_fields = ["created_at", "updated_at", "avatar", "details"]
+    readonly_fields = [
+        "created_at",
+        "updated_at",
+        "fetched_at",
+        "avatar",
+        "details",
+    ]
 
     def authored_count(self, obj):
         return obj.authored_courses.count()
@@ -87,10 +108,13 @@ class CourseAdmin(admin.ModelAdmin):
         "language",
         "created_at",
         "course_lists",
+        "refresh_tier",
+        "removed_at",
     ]
     readonly_fields = [
         "created_at",
         "updated_at",
+        "content_changed_at",
         "cover",
         "raw_data",
         "rating_display",
@@ -139,7 +163,18 @@ class CourseAdmin(admin.ModelAdmin):
                 )
             },
         ),
-        ("Статус", {"fields": ("is_active", "is_public", "is_featured")}),
+        (
+            "Статус",
+            {
+                "fields": (
+                    "is_active",
+                    "is_public",
+                    "is_featured",
+                    "content_changed_at",
+                    "removed_at",
+                )
+            },
+        ),
         ("Рейтинг", {"fields": ("rating_display", "reviews_count_display")}),
         ("Связи", {"fields": ("course_lists", "authors", "instructors")}),
         ("Дополнительно", {"fields": ("raw_data",), "classes": ("collapse",)}),
@@ -156,7 +191,7 @@ class ReviewAdmin(admin.ModelAdmin):
         "create_date",
     ]
     search_fields = ["text", "external_id", "course__title", "user__full_name"]
-    list_filter = ["score", "create_date"]
+    list_filter = ["score", "create_date", "removed_at"]
     readonly_fields = ["created_at", "updated_at", "raw_data"]
     autocomplete_fields = ["course", "user"]
 
@@ -171,6 +206,78 @@ class ReviewAdmin(admin.ModelAdmin):
     user_name.short_description = "Пользователь"
 
 
+@admin.register(FailedRequest)
+class FailedRequestAdmin(admin.ModelAdmin):
+    list_display = ["endpoint", "ids_count", "attempts", "created_at"]
+    search_fields = ["url", "error"]
+    list_filter = ["endpoint", "created_at"]
+    readonly_fields = ["created_at", "updated_at", "ids", "error"]
+
+    def ids_count(self, obj):
+        return len(obj.ids)
+
+    ids_count.short_description = "Объектов"
+
+
+@admin.register(CrawlRun)
+class CrawlRunAdmin(admin.ModelAdmin):
+    list_display = [
+        "pk",
+        "kind",
+        "status",
+        "phase",
+        "courses_done",
+        "elapsed",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["kind", "status", "phase", "created_at"]
+    readonly_fields = [
+        "created_at",
+        "updated_at",
+        "finished_at",
+        "courses_done",
+        "completed_list_ids",
+        "report_summary",
+    ]
+    exclude = ["report"]
+
+    def elapsed(self, obj):
+        return obj.report.get("elapsed")
+
+    elapsed.short_description = "Время, с"
+
+    def report_summary(self, obj):
+        return render_to_string(
+            "admin/crawl_report.html",
+            {"report": obj.report, "labels": HISTOGRAM_LABELS},
+        )
+
+    report_summary.short_description = "Отчёт"
+
+
+@admin.register(CrawlTask)
+class CrawlTaskAdmin(admin.ModelAdmin):
+    list_display = [
+        "pk",
+        "run",
+        "status",
+        "courses_count",
+        "worker",
+        "attempts",
+        "incomplete_fetches",
+        "lease_expires_at",
+    ]
+    list_filter = ["status", "run"]
+    search_fields = ["worker", "error"]
+    readonly_fields = ["created_at", "updated_at", "course_ids", "error"]
+
+    def courses_count(self, obj):
+        return len(obj.course_ids)
+
+    courses_count.short_description = "Курсов"
+
+
 class ParserAdminSite(admin.AdminSite):
     site_header = "Сбор информации со Stepik"
     site_title = "Парсер Stepik"
@@ -184,28 +291,90 @@ class ParserAdminSite(admin.AdminSite):
                 self.admin_view(self.run_parser_view),
                 name="run_parser",
             ),
+            path(
+                "run-parser/<int:pk>/",
+                self.admin_view(self.crawl_progress_view),
+                name="crawl_progress",
+            ),
+            path(
+                "run-parser/<int:pk>/status/",
+                self.admin_view(self.crawl_status_view),
+                name="crawl_status",
+            ),
+            path(
+                "run-parser/<int:pk>/cancel/",
+                self.admin_view(require_POST(self.crawl_cancel_view)),
+                name="crawl_cancel",
+            ),
         ]
         return custom_urls + urls
 
     def run_parser_view(self, request):
         if request.method == "POST":
+            try:
+                run = acquire_run(CrawlRun(status="queued"))
+            except CrawlLocked as e:
+                messages.warning(
+                    request,
+                    f"{e}. Дождитесь его завершения или отмените его.",
+                )
+                active = CrawlRun.objects.filter(lock=True).first()
+                if active is None:
+                    return redirect("admin:run_parser")
+                return redirect("admin:crawl_progress", active.pk)
 
             def run_parser():
                 try:
-                    call_command("run_stepik_parser")
+                    call_command("run_stepik_parser", run_id=run.pk)
                 except Exception as e:
                     print(f"Ошибка парсера: {e}")
+                finally:
+                    CrawlRun.objects.filter(pk=run.pk, lock=True).update(
+                        lock=None, status="failed"
+                    )
+                    connection.close()
 
             thread = threading.Thread(target=run_parser)
             thread.start()
 
-            messages.success(
+            messages.success(request, "Парсер запущен в фоновом режиме!")
+            return redirect("admin:crawl_progress", run.pk)
+
+        return render(
+            request,
+            "admin/run_parser.html",
+            {"active_run": CrawlRun.objects.filter(lock=True).first()},
+        )
+
+    def crawl_progress_view(self, request, pk):
+        run = get_object_or_404(CrawlRun, pk=pk)
+        return render(request, "admin/crawl_progress.html", {"run": run})
+
+    def crawl_status_view(self, request, pk):
+        run = get_object_or_404(CrawlRun, pk=pk)
+        return JsonResponse(
+            {
+                "status": run.get_status_display(),
+                "phase": run.get_phase_display(),
+                "courses_done": run.courses_done,
+                "courses_total": run.courses_total,
+                "cancel_requested": run.cancel_requested,
+                "active": bool(run.lock),
+                "updated_at": run.updated_at.isoformat(),
+            }
+        )
+
+    def crawl_cancel_view(self, request, pk):
+        if CrawlRun.objects.filter(pk=pk, lock=True).update(
+            cancel_requested=True
+        ):
+            messages.info(
                 request,
-                "Парсер запущен в фоновом режиме! Следите за прогрессом в консоли.", # noqa
+                "Отмена запрошена: парсер остановится после текущей пачки.",
             )
-            return redirect("admin:index")
-
-        return render(request, "admin/run_parser.html")
+        else:
+            messages.warning(request, "Этот запуск уже не выполняется.")
+        return redirect("admin:crawl_progress", pk)
 
     def index(self, request, extra_context=None):
         extra_context = extra_context or {}
@@ -220,3 +389,6 @@ admin_site.register(CourseList, CourseListAdmin)
 admin_site.register(StepikUser, StepikUserAdmin)
 admin_site.register(Course, CourseAdmin)
 admin_site.register(Review, ReviewAdmin)
+admin_site.register(FailedRequest, FailedRequestAdmin)
+admin_site.register(CrawlRun, CrawlRunAdmin)
+admin_site.register(CrawlTask, CrawlTaskAdmin)
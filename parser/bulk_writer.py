@@ -0,0 +1,509 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import time
+from typing import Dict, List, Tuple
+
+from django.db import connections, models, transaction
+from django.db.models import Exists, IntegerField, OuterRef, Subquery
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from parser.checkpoints import Checkpointer, CrawlCancelled
+from parser.models import Category, Course, CourseList, Review, StepikUser
+from parser.normalizers import (
+    normalize_category,
+    normalize_course,
+    normalize_course_list,
+    normalize_review,
+    normalize_user,
+)
+from parser.reconcile import remove_missing_reviews
+from parser.relation_linker import RelationLinker
+from parser.text_normalizer import course_text, course_texts
+
+UPDATE_FIELDS = {
+    Category: ["title", "updated_at"],
+    CourseList: [
+        "title",
+        "description",
+        "category",
+        "removed_at",
+        "updated_at",
+    ],
+    StepikUser: [
+        "full_name",
+        "avatar",
+        "bio",
+        "details",
+        "payload_hash",
+        "fetched_at",
+        "updated_at",
+    ],
+    Course: [
+        "title",
+        "slug",
+        "description",
+        "summary",
+        "search_text",
+        "snippet",
+        "cover",
+        "is_paid",
+        "price",
+        "learners_count",
+        "time_to_complete",
+        "language",
+        "is_active",
+        "is_public",
+        "is_featured",
+        "reviews_count",
+        "raw_data",
+        "platform",
+        "payload_hash",
+        "content_hash",
+        "content_changed_at",
+        "removed_at",
+        "updated_at",
+    ],
+    Review: [
+        "course",
+        "user",
+        "score",
+        "text",
+        "create_date",
+        "update_date",
+        "raw_data",
+        "payload_hash",
+        "removed_at",
+        "updated_at",
+    ],
+}
+
+HASHED_MODELS = {StepikUser, Course, Review}
+TOMBSTONED_MODELS = {CourseList, Course, Review}
+FETCHED_MODELS = {StepikUser}
+CONTENT_MODELS = {Course}
+UNIQUE_FIELDS = {Course: ["platform", "external_id"]}
+
+RELATIONS = {
+    CourseList: {"category": Category},
+    Review: {"course": Course, "user": StepikUser},
+}
+RELATION_SCOPES = {Course: {"platform": "stepik"}}
+
+
+def row_key(obj: models.Model) -> tuple:
+    return tuple(
+        getattr(obj, field)
+        for field in UNIQUE_FIELDS.get(type(obj), ["external_id"])
+    )
+
+
+def link_review_users(using: str = "default") -> int:
+    users = StepikUser.objects.using(using).filter(
+        external_id=Cast(
+            KeyTextTransform("user", OuterRef("raw_data")), IntegerField()
+        )
+    )
+    return (
+        Review.objects.using(using)
+        .filter(user__isnull=True, course__platform="stepik")
+        .filter(Exists(users))
+        .update(user=Subquery(users.values("pk")[:1]))
+    )
+
+
+class BulkWriter:
+    MODELS = (Category, CourseList, StepikUser, Course, Review)
+
+    def __init__(self, chunk_size: int = 500, using: str = "default"):
+        self.chunk_size = chunk_size
+        self.using = using
+        self.rows = {model: {} for model in self.MODELS}
+        self.refs = {model: {} for model in RELATIONS}
+        self.timings = {}
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self.rows.values())
+
+    def add(self, obj: models.Model, **refs) -> None:
+        model = type(obj)
+        self.rows[model][row_key(obj)] = obj
+        if model in RELATIONS:
+            self.refs[model][obj.external_id] = refs
+
+    def clear(self) -> None:
+        for rows in self.rows.values():
+            rows.clear()
+        for refs in self.refs.values():
+            refs.clear()
+
+    def flush(self) -> Dict[str, Dict[str, int]]:
+        stats = {}
+        with transaction.atomic(using=self.using):
+            for model in self.MODELS:
+                rows = list(self.rows[model].values())
+                if not rows:
+                    continue
+                started = time.monotonic()
+                if model in RELATIONS:
+                    self._resolve_refs(model, rows)
+                stats[model.__name__] = self._upsert(model, rows)
+                self.timings[model.__name__] = (
+                    self.timings.get(model.__name__, 0.0)
+                    + time.monotonic()
+                    - started
+                )
+
+        self.clear()
+        self.report(stats)
+        return stats
+
+    def _resolve_refs(self, model, rows: List[models.Model]) -> None:
+        refs = self.refs[model]
+        for field, related_model in RELATIONS[model].items():
+            external_ids = {
+                refs[row.external_id].get(field) for row in rows
+            } - {None}
+            pk_by_external_id = dict(
+                related_model.objects.using(self.using)
+                .filter(
+                    external_id__in=external_ids,
+                    **RELATION_SCOPES.get(related_model, {}),
+                )
+                .values_list("external_id", "pk")
+            )
+            for row in rows:
+                external_id = refs[row.external_id].get(field)
+                setattr(
+                    row, f"{field}_id", pk_by_external_id.get(external_id)
+                )
+
+    def _upsert(self, model, rows: List[models.Model]) -> Dict[str, int]:
+        hashed = model in HASHED_MODELS
+        objects = model.objects.using(self.using)
+        unique_fields = UNIQUE_FIELDS.get(model, ["external_id"])
+        fields = [*unique_fields, "payload_hash" if hashed else "pk"]
+        if model in TOMBSTONED_MODELS:
+            fields.append("removed_at")
+        if model in CONTENT_MODELS:
+            fields += ["content_hash", "content_changed_at"]
+        fetched_at = timezone.now()
+        inserted = 0
+        updated = 0
+        skipped = 0
+
+        for i in range(0, len(rows), self.chunk_size):
+            chunk = rows[i: i + self.chunk_size]
+            existing = {}
+            for values in objects.filter(
+                external_id__in=[row.external_id for row in chunk]
+            ).values(*fields):
+                key = tuple(values[field] for field in unique_fields)
+                existing[key] = values
+            if hashed:
+                changed = [
+                    row
+                    for row in chunk
+                    if row_key(row) not in existing
+                    or existing[row_key(row)]["payload_hash"]
+                    != row.payload_hash
+                    or existing[row_key(row)].get("removed_at") is not None
+                ]
+                skipped += len(chunk) - len(changed)
+                if model in FETCHED_MODELS and len(changed) < len(chunk):
+                    changed_keys = {row_key(row) for row in changed}
+                    objects.filter(
+                        external_id__in=[
+                            row.external_id
+                            for row in chunk
+                            if row_key(row) not in changed_keys
+                        ]
+                    ).update(fetched_at=fetched_at)
+                chunk = changed
+            if not chunk:
+                continue
+            if model in FETCHED_MODELS:
+                for row in chunk:
+                    row.fetched_at = fetched_at
+            if model in CONTENT_MODELS:
+                self._stamp_content_changes(chunk, existing, fetched_at)
+
+            objects.bulk_create(
+                chunk,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=UPDATE_FIELDS[model],
+            )
+            new = sum(1 for row in chunk if row_key(row) not in existing)
+            inserted += new
+            updated += len(chunk) - new
+
+        return {"inserted": inserted, "updated": updated, "skipped": skipped}
+
+    @staticmethod
+    def _stamp_content_changes(
+        rows: List[models.Model], existing: Dict[tuple, Dict], now
+    ) -> None:
+        for row in rows:
+            stored = existing.get(row_key(row))
+            if stored is None:
+                continue
+            if stored["content_hash"] and (
+                stored["content_hash"] != row.content_hash
+            ):
+                row.content_changed_at = now
+            else:
+                row.content_changed_at = stored["content_changed_at"]
+
+    @staticmethod
+    def report(stats: Dict[str, Dict[str, int]]) -> None:
+        for name, counts in stats.items():
+            print(
+                f"Запись {name}: добавлено {counts['inserted']}, "
+                f"обновлено {counts['updated']}, "
+                f"без изменений {counts['skipped']}"
+            )
+
+
+class DBWriter:
+    def __init__(
+        self,
+        batch_size: int = 100,
+        chunk_size: int = 500,
+        using: str = "default",
+        text_workers: int = 0,
+    ):
+        self.batch_size = batch_size
+        self.using = using
+        self.text_workers = text_workers
+        self.text_pool = None
+        if text_workers:
+            self.text_pool = ProcessPoolExecutor(
+                max_workers=text_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        self.writer = BulkWriter(chunk_size, using)
+        self.linker = RelationLinker(using)
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="db-writer"
+        )
+        self.checkpointer = None
+        self.written = 0
+        self.written_user_ids = set()
+        self.rows_written = 0
+        self.checkpoint_time = 0.0
+
+    async def submit(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def start_run(
+        self, resume: bool = False, run_id: int = None, kind: str = "full"
+    ) -> Checkpointer:
+        self.checkpointer = await self.submit(
+            Checkpointer.start, resume, run_id, kind
+        )
+        return self.checkpointer
+
+    async def set_phase(self, phase: str) -> None:
+        if self.checkpointer is not None:
+            await self.submit(self.checkpointer.set_phase, phase)
+
+    async def write_catalog(
+        self, categories: List[Dict], course_lists: List[Dict]
+    ) -> None:
+        await self.submit(self._write_catalog, categories, course_lists)
+
+    async def write_users(self, users: Dict[int, Dict]) -> None:
+        await self.submit(self._write_users, users)
+
+    async def index_texts(
+        self, items: List[Tuple[str, str, str]]
+    ) -> List[Tuple[str, str]]:
+        loop = asyncio.get_running_loop()
+        size = max(1, -(-len(items) // self.text_workers))
+        chunks = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self.text_pool, course_texts, items[i: i + size]
+                )
+                for i in range(0, len(items), size)
+            )
+        )
+        return [text for chunk in chunks for text in chunk]
+
+    async def index_records(self, records: List[Dict]) -> None:
+        if self.text_pool is None:
+            return
+        texts = await self.index_texts(
+            [
+                (
+                    record["course"].get("title", ""),
+                    record["course"].get("summary", ""),
+                    record["course"].get("description", ""),
+                )
+                for record in records
+            ]
+        )
+        for record, text in zip(records, texts):
+            record["text"] = text
+
+    async def write_courses(self, courses: List[Course]) -> None:
+        if self.text_pool is not None:
+            texts = await self.index_texts(
+                [
+                    (course.title, course.summary, course.description)
+                    for course in courses
+                ]
+            )
+            for course, (search_text, snippet) in zip(courses, texts):
+                course.search_text = search_text
+                course.snippet = snippet
+        await self.submit(self._write_courses, courses)
+
+    async def run(self, queue: asyncio.Queue) -> int:
+        batch = []
+        while True:
+            record = await queue.get()
+            if record is not None:
+                batch.append(record)
+            if batch and (record is None or len(batch) >= self.batch_size):
+                await self.index_records(batch)
+                await self.submit(self._write_batch, batch)
+                batch = []
+                if (
+                    record is not None
+                    and self.checkpointer is not None
+                    and self.checkpointer.cancelled
+                ):
+                    raise CrawlCancelled(
+                        f"Запуск {self.checkpointer.run.pk} отменён"
+                    )
+            if record is None:
+                return self.written
+
+    def defer(self, func, *args) -> None:
+        self.executor.submit(func, *args)
+
+    def close(self) -> None:
+        self.executor.submit(connections.close_all)
+        self.executor.shutdown(wait=True)
+        if self.text_pool is not None:
+            self.text_pool.shutdown(wait=True)
+
+    def db_timings(self) -> Dict[str, float]:
+        timings = dict(self.writer.timings)
+        timings.update(self.linker.timings)
+        if self.checkpoint_time:
+            timings["CrawlCheckpoint"] = self.checkpoint_time
+        return timings
+
+    def count_rows(self, stats: Dict[str, Dict[str, int]]) -> None:
+        for counts in stats.values():
+            self.rows_written += sum(
+                count for name, count in counts.items() if name != "skipped"
+            )
+
+    def _write_catalog(
+        self, categories: List[Dict], course_lists: List[Dict]
+    ) -> None:
+        for category_data in categories:
+            self.writer.add(normalize_category(category_data))
+        for list_data in course_lists:
+            self.writer.add(
+                normalize_course_list(list_data),
+                category=list_data.get("category_id"),
+            )
+        self.count_rows(self.writer.flush())
+
+    def _write_users(self, users: Dict[int, Dict]) -> None:
+        for user_data in users.values():
+            self.writer.add(normalize_user(user_data))
+        self.count_rows(self.writer.flush())
+        self.written_user_ids.update(users)
+
+    def _write_courses(self, courses: List[Course]) -> None:
+        for course in courses:
+            if self.text_pool is None:
+                course.search_text, course.snippet = course_text(
+                    course.title, course.summary, course.description
+                )
+            self.writer.add(course)
+        self.count_rows(self.writer.flush())
+
+    def _write_batch(self, records: List[Dict]) -> None:
+        for record in records:
+            self._add_course_record(record)
+        user_ids = {
+            user.external_id for user in self.writer.rows[StepikUser].values()
+        }
+
+        with transaction.atomic(using=self.using):
+            self.count_rows(self.writer.flush())
+            self.count_rows(self.linker.flush())
+            self._remove_missing_reviews(records)
+            if self.checkpointer is not None:
+                started = time.monotonic()
+                self.checkpointer.record(
+                    record["course"]["id"] for record in records
+                )
+                self.checkpoint_time += time.monotonic() - started
+        if self.checkpointer is not None:
+            self.checkpointer.check_cancelled()
+        self.written_user_ids.update(user_ids)
+
+        self.written += len(records)
+        print(f"Записано курсов: {self.written}")
+
+    def _remove_missing_reviews(self, records: List[Dict]) -> None:
+        reviews_by_course = {
+            record["course"]["id"]: {
+                review["id"] for review in record["reviews"]
+            }
+            for record in records
+            if record.get("reviews_complete")
+        }
+        if not reviews_by_course:
+            return
+        started = time.monotonic()
+        removed = remove_missing_reviews(
+            reviews_by_course, self.writer.chunk_size, self.using
+        )
+        self.writer.timings["ReviewRemoval"] = (
+            self.writer.timings.get("ReviewRemoval", 0.0)
+            + time.monotonic()
+            - started
+        )
+        if removed:
+            print(f"Отзывов удалено на Stepik: {removed}")
+            self.rows_written += removed
+
+    def _add_course_record(self, record: Dict) -> None:
+        course = record["course"]
+
+        for user_id, user_data in record["users"].items():
+            if user_id not in self.written_user_ids:
+                self.writer.add(normalize_user(user_data))
+
+        course_obj = normalize_course(course)
+        if "text" not in record:
+            record["text"] = course_text(
+                course_obj.title, course_obj.summary, course_obj.description
+            )
+        course_obj.search_text, course_obj.snippet = record["text"]
+        self.writer.add(course_obj)
+        self.linker.add(
+            course["id"],
+            course_lists=record["course_lists"],
+            authors=course.get("authors", []),
+            instructors=course.get("instructors", []),
+        )
+
+        for review in record["reviews"]:
+            self.writer.add(
+                normalize_review(review),
+                course=course["id"],
+                user=review.get("user"),
+            )
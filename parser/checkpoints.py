@@ -0,0 +1,175 @@
+from datetime import timedelta
+from typing import Dict, Iterable, List, Set
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from parser.models import CrawlCheckpoint, CrawlRun
+
+STALE_AFTER = timedelta(minutes=30)
+
+
+class CrawlLocked(Exception):
+    pass
+
+
+class CrawlCancelled(Exception):
+    pass
+
+
+def release_stale_runs() -> int:
+    return CrawlRun.objects.filter(
+        lock=True, updated_at__lt=timezone.now() - STALE_AFTER
+    ).update(lock=None, status="failed")
+
+
+def release_run(run: CrawlRun) -> None:
+    CrawlRun.objects.filter(pk=run.pk).update(lock=None)
+
+
+def completed_course_ids(run: CrawlRun) -> Set[int]:
+    return set(run.checkpoints.values_list("course_external_id", flat=True))
+
+
+def acquire_run(run: CrawlRun, update_fields: List[str] = None) -> CrawlRun:
+    release_stale_runs()
+    run.lock = True
+    try:
+        with transaction.atomic():
+            run.save(update_fields=update_fields)
+    except IntegrityError:
+        active = CrawlRun.objects.filter(lock=True).first()
+        raise CrawlLocked(
+            f"Уже выполняется запуск {active.pk if active else ''}".strip()
+        )
+    return run
+
+
+class Checkpointer:
+    def __init__(self, run: CrawlRun, completed_course_ids: Set[int] = None):
+        self.run = run
+        self.completed_course_ids = completed_course_ids or set()
+        self.completed_list_ids = set(run.completed_list_ids)
+        self.list_ids_by_course = {}
+        self.remaining_by_list = {}
+        self.cancelled = False
+
+    @classmethod
+    def start(
+        cls, resume: bool = False, run_id: int = None, kind: str = "full"
+    ) -> "Checkpointer":
+        if run_id is not None:
+            run = CrawlRun.objects.get(pk=run_id)
+            run.status = "running"
+            run.kind = kind
+            run.save(update_fields=["status", "kind", "updated_at"])
+            return cls(run, completed_course_ids(run))
+
+        if resume:
+            run = (
+                CrawlRun.objects.filter(lock__isnull=True, kind=kind)
+                .exclude(status="finished")
+                .order_by("-created_at")
+                .first()
+            )
+            if run is not None:
+                completed = completed_course_ids(run)
+                run.status = "running"
+                run.finished_at = None
+                run.cancel_requested = False
+                acquire_run(
+                    run,
+                    [
+                        "status",
+                        "finished_at",
+                        "cancel_requested",
+                        "lock",
+                        "updated_at",
+                    ],
+                )
+                print(
+                    f"Продолжение запуска {run.pk} с этапа "
+                    f"«{run.get_phase_display()}», "
+                    f"уже обработано курсов: {len(completed)}"
+                )
+                return cls(run, completed)
+            print("Незавершённых запусков нет, начинаем новый")
+
+        return cls(acquire_run(CrawlRun(status="running", kind=kind)))
+
+    def plan(
+        self,
+        course_ids: Iterable[int],
+        list_ids_by_course: Dict[int, Set[int]],
+    ) -> Set[int]:
+        self.list_ids_by_course = list_ids_by_course
+        self.remaining_by_list = {}
+        course_ids = set(course_ids)
+        self.run.courses_total = len(course_ids)
+        pending = course_ids - self.completed_course_ids
+        for course_id in pending:
+            for list_id in list_ids_by_course.get(course_id, ()):
+                self.remaining_by_list[list_id] = (
+                    self.remaining_by_list.get(list_id, 0) + 1
+                )
+        return pending
+
+    def set_phase(self, phase: str) -> None:
+        self.run.phase = phase
+        self.run.save(update_fields=["phase", "courses_total", "updated_at"])
+
+    def record(self, course_ids: Iterable[int]) -> None:
+        course_ids = set(course_ids) - self.completed_course_ids
+        CrawlCheckpoint.objects.bulk_create(
+            [
+                CrawlCheckpoint(run=self.run, course_external_id=course_id)
+                for course_id in course_ids
+            ],
+            ignore_conflicts=True,
+        )
+        self.completed_course_ids.update(course_ids)
+
+        update_fields = ["courses_done", "updated_at"]
+        completed_lists = len(self.completed_list_ids)
+        for course_id in course_ids:
+            for list_id in self.list_ids_by_course.get(course_id, ()):
+                if list_id not in self.remaining_by_list:
+                    continue
+                self.remaining_by_list[list_id] -= 1
+                if not self.remaining_by_list[list_id]:
+                    del self.remaining_by_list[list_id]
+                    self.completed_list_ids.add(list_id)
+        if len(self.completed_list_ids) > completed_lists:
+            self.run.completed_list_ids = sorted(self.completed_list_ids)
+            update_fields.append("completed_list_ids")
+
+        self.run.courses_done = self.run.checkpoints.count()
+        self.run.save(update_fields=update_fields)
+
+    def check_cancelled(self) -> bool:
+        self.cancelled = CrawlRun.objects.filter(
+            pk=self.run.pk, cancel_requested=True
+        ).exists()
+        return self.cancelled
+
+    def finish(
+        self, status: str, report: Dict = None, release: bool = True
+    ) -> None:
+        self.run.status = status
+        if release:
+            self.run.lock = None
+        if report is not None:
+            self.run.report = report
+        if status == "finished":
+            self.run.phase = "finished"
+            self.run.finished_at = timezone.now()
+        self.run.save(
+            update_fields=[
+                "status",
+                "phase",
+                "finished_at",
+                "report",
+                "lock",
+                "updated_at",
+            ]
+        )
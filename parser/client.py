@@ -0,0 +1,235 @@
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import json
+import random
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from fake_useragent import UserAgent
+
+from parser.http_cache import ResponseCache
+from parser.limiter import (
+    AdaptiveLimiter,
+    CANCELLED,
+    ERROR,
+    OK,
+    RateLimiter,
+    THROTTLED,
+)
+from parser.metrics import CrawlMetrics
+
+try:
+    import brotli  # noqa: F401
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CacheMiss(Exception):
+    pass
+
+
+class RequestFailed(Exception):
+    def __init__(
+        self, url: str, attempts: int, error: Exception, retryable=True
+    ):
+        super().__init__(f"{error} (попыток: {attempts})")
+        self.url = url
+        self.attempts = attempts
+        self.error = error
+        self.retryable = retryable
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def endpoint_name(url: str) -> str:
+    return urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+class StepikClient:
+    def __init__(
+        self,
+        max_concurrent: int = 10,
+        max_concurrent_limit: int = 64,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        headers_pool_size: int = 20,
+        timeout: float = 60,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: int = 300,
+        cache: ResponseCache = None,
+        replay: bool = False,
+        metrics: CrawlMetrics = None,
+        rate_limit: float = None,
+    ):
+        self.max_concurrent_limit = max(max_concurrent, max_concurrent_limit)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.headers_pool_size = headers_pool_size
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.limiter = AdaptiveLimiter(
+            max_concurrent, max_limit=self.max_concurrent_limit
+        )
+        self.cache = cache
+        self.replay = replay
+        self.headers_pool = []
+        self.session = None
+        self.metrics = metrics or CrawlMetrics()
+        self.rate_limiter = RateLimiter(rate_limit)
+
+    async def __aenter__(self) -> "StepikClient":
+        if self.replay:
+            return self
+
+        self.headers_pool = self._build_headers_pool()
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrent_limit,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get_cached(self, keys: List[str]) -> Dict[str, Dict]:
+        if self.cache is None:
+            return {}
+        return await asyncio.to_thread(
+            self.cache.get_many, keys, self.replay
+        )
+
+    async def store_cached(self, items: Dict[str, Dict]) -> None:
+        if self.cache is not None and not self.replay:
+            await asyncio.to_thread(self.cache.set_many, items)
+
+    def _build_headers_pool(self) -> list:
+        ua = UserAgent()
+        return [
+            {
+                "User-Agent": ua.random,
+                "Accept": "application/json",
+                "Accept-Encoding": ACCEPT_ENCODING,
+            }
+            for _ in range(self.headers_pool_size)
+        ]
+
+    def _backoff_delay(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(delay / 2, delay)
+
+    async def get_json(
+        self, url: str, endpoint: str = None, use_cache: bool = True
+    ) -> Dict:
+        endpoint = endpoint or endpoint_name(url)
+
+        if use_cache and self.cache is not None:
+            cached = await self.get_cached([url])
+            if url in cached:
+                return cached[url]
+        if self.replay:
+            raise RequestFailed(
+                url, 0, CacheMiss(f"нет в кэше: {url}"), retryable=False
+            )
+
+        data = await self._fetch(url, endpoint)
+        if use_cache:
+            await self.store_cached({url: data})
+        return data
+
+    async def _fetch(self, url: str, endpoint: str) -> Dict:
+        error = None
+
+        for attempt in range(1, self.max_retries + 2):
+            retry_after = None
+            outcome = ERROR
+            size = 0
+            succeeded = False
+            headers = random.choice(self.headers_pool)
+            await self.rate_limiter.acquire()
+            started = await self.limiter.acquire()
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status in (429, 503):
+                        outcome = THROTTLED
+                        retry_after = parse_retry_after(
+                            response.headers.get("Retry-After")
+                        )
+                    response.raise_for_status()
+                    body = await response.read()
+                    size = len(body)
+                    data = json.loads(body)
+                    outcome = OK
+                    succeeded = True
+                    return data
+            except aiohttp.ClientResponseError as e:
+                if e.status not in RETRY_STATUSES:
+                    outcome = OK
+                    raise RequestFailed(url, attempt, e, retryable=False)
+                error = e
+            except asyncio.TimeoutError as e:
+                outcome = THROTTLED
+                error = e
+            except (aiohttp.ClientError, ValueError) as e:
+                error = e
+            except asyncio.CancelledError:
+                outcome = CANCELLED
+                raise
+            finally:
+                self.limiter.release(started, outcome)
+                if outcome != CANCELLED:
+                    self.metrics.observe_request(
+                        endpoint,
+                        time.monotonic() - started,
+                        size,
+                        error=not succeeded,
+                    )
+
+            if attempt > self.max_retries:
+                break
+            if retry_after is None:
+                retry_after = self._backoff_delay(attempt)
+            await asyncio.sleep(min(retry_after, self.backoff_max))
+
+        raise RequestFailed(url, attempt, error)
+
+    def summary(self) -> str:
+        summary = ", ".join(
+            f"{endpoint}: {stats.requests} (ошибок {stats.errors})"
+            for endpoint, stats in sorted(self.metrics.endpoints.items())
+        )
+        if self.cache is not None:
+            summary += (
+                f"; кэш: попаданий {self.cache.hits}, "
+                f"промахов {self.cache.misses}"
+            )
+        return summary
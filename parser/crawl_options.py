@@ -0,0 +1,179 @@
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from parser.http_cache import ResponseCache
+from parser.stepik_parser import STEPIK_API_URL
+
+
+def add_concurrency_arguments(parser) -> None:
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=10,
+        help="Начальное число параллельных запросов",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=64,
+        help="Верхняя граница параллельных запросов",
+    )
+    parser.add_argument(
+        "--course-concurrency",
+        type=int,
+        default=None,
+        help="Сколько курсов обрабатывать параллельно",
+    )
+
+
+def concurrency_options(options: Dict) -> Dict:
+    return {
+        "max_concurrent": options["concurrency"],
+        "max_concurrent_limit": options["max_concurrency"],
+        "course_concurrency": options["course_concurrency"],
+    }
+
+
+def add_crawl_arguments(parser) -> None:
+    add_concurrency_arguments(parser)
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=500,
+        help="Размер пачки для массовой записи в БД",
+    )
+    parser.add_argument(
+        "--incremental-reviews",
+        action="store_true",
+        help="Загружать отзывы только до первого уже сохранённого",
+    )
+    parser.add_argument(
+        "--user-ttl-hours",
+        type=float,
+        default=24,
+        help="Не обновлять пользователей, обновлённых за это время",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Сколько раз повторять неудачный запрос",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Загружать отзывы и пользователей для всех курсов, "
+        "а не только для изменившихся",
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=120,
+        help="Срок аренды задачи обработчиком",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="Общий предел запросов в секунду на все обработчики",
+    )
+    parser.add_argument(
+        "--text-workers",
+        type=int,
+        default=2,
+        help="Число процессов для подготовки текста поиска "
+        "(0 — в потоке записи)",
+    )
+    parser.add_argument(
+        "--api-url",
+        default=STEPIK_API_URL,
+        help="Адрес API Stepik",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Сохранять ответы API в дисковый кэш и читать из него",
+    )
+    parser.add_argument(
+        "--cache-ttl-hours",
+        type=float,
+        default=24,
+        help="Срок жизни записей дискового кэша",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=settings.STEPIK_CACHE_DIR,
+        help="Каталог дискового кэша",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Брать все ответы только из кэша, без обращения к сети",
+    )
+
+
+def response_cache(options: Dict) -> Optional[ResponseCache]:
+    if not options["cache"] and not options["replay"]:
+        return None
+    return ResponseCache(
+        options["cache_dir"], timedelta(hours=options["cache_ttl_hours"])
+    )
+
+
+def crawl_options(options: Dict) -> Dict:
+    return {
+        **concurrency_options(options),
+        "chunk_size": options["chunk_size"],
+        "incremental_reviews": options["incremental_reviews"],
+        "user_ttl": timedelta(hours=options["user_ttl_hours"]),
+        "max_retries": options["max_retries"],
+        "delta": not options["full"],
+        "rate_limit": options["rate_limit"],
+        "text_workers": options["text_workers"],
+        "api_url": options["api_url"],
+        "cache": response_cache(options),
+        "replay": options["replay"],
+    }
+
+
+def crawl_arguments(options: Dict) -> List[str]:
+    arguments = [
+        "--concurrency",
+        str(options["concurrency"]),
+        "--max-concurrency",
+        str(options["max_concurrency"]),
+        "--chunk-size",
+        str(options["chunk_size"]),
+        "--user-ttl-hours",
+        str(options["user_ttl_hours"]),
+        "--max-retries",
+        str(options["max_retries"]),
+        "--lease-seconds",
+        str(options["lease_seconds"]),
+        "--text-workers",
+        str(options["text_workers"]),
+        "--api-url",
+        options["api_url"],
+        "--cache-ttl-hours",
+        str(options["cache_ttl_hours"]),
+        "--cache-dir",
+        str(options["cache_dir"]),
+    ]
+    if options["course_concurrency"]:
+        arguments += [
+            "--course-concurrency",
+            str(options["course_concurrency"]),
+        ]
+    if options["rate_limit"]:
+        arguments += ["--rate-limit", str(options["rate_limit"])]
+    if options["incremental_reviews"]:
+        arguments.append("--incremental-reviews")
+    if options["full"]:
+        arguments.append("--full")
+    if options["cache"]:
+        arguments.append("--cache")
+    if options["replay"]:
+        arguments.append("--replay")
+    return arguments
@@ -0,0 +1,409 @@
+import gzip
+import json
+from pathlib import Path
+import re
+import tempfile
+import time
+from typing import Dict, Iterator, List, TextIO, Tuple
+
+from django.db import transaction
+
+from parser.bulk_writer import BulkWriter, link_review_users
+from parser.models import Course, CourseList, StepikUser
+from parser.normalizers import (
+    normalize_course,
+    normalize_course_list,
+    normalize_review,
+    normalize_user,
+)
+from parser.relation_linker import RelationLinker
+from parser.text_normalizer import course_text
+
+DUMP_TYPES = ("course-lists", "users", "courses", "course-reviews")
+READ_SIZE = 1 << 20
+MAX_RECORD_SIZE = 64 << 20
+WHITESPACE = re.compile(r"\s*")
+decoder = json.JSONDecoder()
+
+
+class DumpError(Exception):
+    pass
+
+
+def open_dump(path: Path) -> TextIO:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+class DumpReader:
+    def __init__(
+        self,
+        file: TextIO,
+        default_type: str = "courses",
+        read_size: int = READ_SIZE,
+        max_record_size: int = MAX_RECORD_SIZE,
+    ):
+        self.file = file
+        self.default_type = default_type
+        self.read_size = read_size
+        self.max_record_size = max_record_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict]]:
+        while True:
+            char = self.peek()
+            if not char:
+                return
+            if char == "[":
+                for item in self.array():
+                    yield from self.page_items(item)
+            elif char == "{":
+                yield from self.page()
+            else:
+                raise DumpError(f"Ожидался объект или массив, найдено {char}")
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        pending = len(self.buffer) - self.pos
+        if pending > self.max_record_size:
+            raise DumpError("Слишком большая запись или некорректный JSON")
+        chunk = self.file.read(max(self.read_size, pending))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, expected: str) -> None:
+        char = self.peek()
+        if char != expected:
+            raise DumpError(f"Ожидался символ {expected}, найдено {char!r}")
+        self.pos += 1
+
+    def separator(self, closing: str) -> bool:
+        char = self.peek()
+        self.pos += 1
+        if char == closing:
+            return False
+        if char != ",":
+            raise DumpError(f"Ожидалась запятая или {closing}")
+        return True
+
+    def value(self):
+        while True:
+            self.peek()
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self.fill():
+                    continue
+                raise DumpError(f"Некорректный JSON: {e}")
+            if end >= len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def array(self) -> Iterator:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if not self.separator("]"):
+                return
+
+    def page(self) -> Iterator[Tuple[str, Dict]]:
+        self.expect("{")
+        rest = {}
+        typed = False
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            if key in DUMP_TYPES and self.peek() == "[":
+                values = []
+                for item in self.array():
+                    if isinstance(item, dict):
+                        typed = True
+                        yield key, item
+                    else:
+                        values.append(item)
+                rest[key] = values
+            else:
+                rest[key] = self.value()
+            if not self.separator("}"):
+                break
+        if not typed and "meta" not in rest:
+            yield self.default_type, rest
+
+    def page_items(self, item) -> Iterator[Tuple[str, Dict]]:
+        if not isinstance(item, dict):
+            raise DumpError("Элемент массива должен быть объектом")
+        kinds = [
+            kind
+            for kind in DUMP_TYPES
+            if isinstance(item.get(kind), list)
+            and any(isinstance(obj, dict) for obj in item[kind])
+        ]
+        if not kinds and "meta" not in item:
+            yield self.default_type, item
+        for kind in kinds:
+            for obj in item[kind]:
+                if isinstance(obj, dict):
+                    yield kind, obj
+
+
+class DumpImporter:
+    def __init__(
+        self,
+        batch_size: int = 1000,
+        chunk_size: int = 500,
+        using: str = "default",
+    ):
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.using = using
+        self.writer = BulkWriter(chunk_size, using)
+        self.linker = RelationLinker(using)
+        self.pending = {kind: [] for kind in DUMP_TYPES}
+        self.pending_count = 0
+        self.spill = None
+        self.deferred = 0
+        self.list_ids_by_course = {}
+        self.counts = {kind: 0 for kind in DUMP_TYPES}
+        self.invalid = 0
+        self.orphans = 0
+        self.rows_written = 0
+        self.started = time.monotonic()
+
+    @property
+    def records(self) -> int:
+        return sum(self.counts.values())
+
+    def rate(self) -> float:
+        return self.records / max(time.monotonic() - self.started, 1e-9)
+
+    def import_file(self, path: Path, default_type: str = "courses") -> None:
+        with open_dump(path) as file:
+            for kind, data in DumpReader(file, default_type):
+                self.add(kind, data)
+
+    def add(self, kind: str, data: Dict) -> None:
+        if not isinstance(data.get("id"), int):
+            self.invalid += 1
+            return
+        self.pending[kind].append(data)
+        self.pending_count += 1
+        self.counts[kind] += 1
+        if kind == "course-lists":
+            for course_id in data.get("courses", []):
+                self.list_ids_by_course.setdefault(course_id, set()).add(
+                    data["id"]
+                )
+        if self.pending_count >= self.batch_size:
+            self.flush()
+
+    def finish(self) -> Dict[str, int]:
+        self.flush()
+        self.replay_deferred()
+        linked = link_review_users(self.using)
+        if linked:
+            print(f"Отзывов привязано к пользователям: {linked}")
+            self.rows_written += linked
+        self.link_course_lists()
+        return {
+            **self.counts,
+            "invalid": self.invalid,
+            "orphans": self.orphans,
+            "rows_written": self.rows_written,
+        }
+
+    def defer(self, kind: str, data: Dict) -> None:
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.spill.write(json.dumps([kind, data], ensure_ascii=False) + "\n")
+        self.deferred += 1
+
+    def replay_deferred(self) -> None:
+        if self.spill is None:
+            return
+        print(f"Повторная обработка отложенных записей: {self.deferred}")
+        self.spill.seek(0)
+        for line in self.spill:
+            kind, data = json.loads(line)
+            if kind == "links":
+                self.linker.add(
+                    data["id"],
+                    authors=data["authors"],
+                    instructors=data["instructors"],
+                )
+            else:
+                self.pending[kind].append(data)
+                self.pending_count += 1
+            if self.pending_count + len(self.linker) >= self.batch_size:
+                self.flush(final=True)
+        self.flush(final=True)
+        self.spill.close()
+        self.spill = None
+
+    def flush(self, final: bool = False) -> None:
+        lists = self.pending["course-lists"]
+        users = self.pending["users"]
+        courses = self.pending["courses"]
+        reviews = self.pending["course-reviews"]
+        self.pending = {kind: [] for kind in DUMP_TYPES}
+        self.pending_count = 0
+
+        with transaction.atomic(using=self.using):
+            self.add_course_lists(lists)
+            for user_data in users:
+                self.writer.add(normalize_user(user_data))
+            for course_data in courses:
+                self.add_course(course_data)
+            self.add_reviews(reviews, final)
+            self.count_rows(self.writer.flush())
+            self.link_people(courses, final)
+            self.count_rows(self.linker.flush())
+
+        print(
+            f"Импортировано записей: {self.records} "
+            f"({self.rate():.1f}/с)"
+        )
+
+    def add_course_lists(self, lists: List[Dict]) -> None:
+        categories = dict(
+            CourseList.objects.using(self.using)
+            .filter(external_id__in=[data["id"] for data in lists])
+            .values_list("external_id", "category__external_id")
+        )
+        for list_data in lists:
+            self.writer.add(
+                normalize_course_list(list_data),
+                category=list_data.get(
+                    "category_id", categories.get(list_data["id"])
+                ),
+            )
+
+    def add_course(self, course_data: Dict) -> None:
+        course = normalize_course(course_data)
+        course.search_text, course.snippet = course_text(
+            course.title, course.summary, course.description
+        )
+        self.writer.add(course)
+
+    def add_reviews(self, reviews: List[Dict], final: bool) -> None:
+        known_courses = set(self.writer.rows[Course]) | {
+            ("stepik", course_id)
+            for course_id in Course.objects.using(self.using)
+            .filter(
+                platform="stepik",
+                external_id__in={review.get("course") for review in reviews},
+            )
+            .values_list("external_id", flat=True)
+        }
+        for review in reviews:
+            if ("stepik", review.get("course")) in known_courses:
+                self.writer.add(
+                    normalize_review(review),
+                    course=review["course"],
+                    user=review.get("user"),
+                )
+            elif final:
+                self.orphans += 1
+            else:
+                self.defer("course-reviews", review)
+
+    def link_people(self, courses: List[Dict], final: bool) -> None:
+        user_ids = set()
+        for course in courses:
+            user_ids.update(course.get("authors", []))
+            user_ids.update(course.get("instructors", []))
+        known = set(
+            StepikUser.objects.using(self.using)
+            .filter(external_id__in=user_ids)
+            .values_list("external_id", flat=True)
+        )
+        for course in courses:
+            authors = course.get("authors", [])
+            instructors = course.get("instructors", [])
+            self.linker.add(
+                course["id"], authors=authors, instructors=instructors
+            )
+            if not final and not known.issuperset(authors + instructors):
+                self.defer(
+                    "links",
+                    {
+                        "id": course["id"],
+                        "authors": authors,
+                        "instructors": instructors,
+                    },
+                )
+
+    def link_course_lists(self) -> None:
+        field = Course._meta.get_field("course_lists")
+        through = field.remote_field.through
+        source_column = field.m2m_column_name()
+        target_column = field.m2m_reverse_name()
+        list_ids = set().union(*self.list_ids_by_course.values())
+        list_pks = dict(
+            CourseList.objects.using(self.using)
+            .filter(external_id__in=list_ids)
+            .values_list("external_id", "pk")
+        )
+        course_ids = list(self.list_ids_by_course)
+        linked = 0
+        for i in range(0, len(course_ids), self.chunk_size):
+            course_pks = dict(
+                Course.objects.using(self.using)
+                .filter(
+                    platform="stepik",
+                    external_id__in=course_ids[i: i + self.chunk_size],
+                )
+                .values_list("external_id", "pk")
+            )
+            desired = {
+                (course_pk, list_pks[list_id])
+                for course_id, course_pk in course_pks.items()
+                for list_id in self.list_ids_by_course[course_id]
+                if list_id in list_pks
+            }
+            desired -= set(
+                through.objects.using(self.using)
+                .filter(**{f"{source_column}__in": course_pks.values()})
+                .values_list(source_column, target_column)
+            )
+            through.objects.using(self.using).bulk_create(
+                [
+                    through(
+                        **{source_column: course_pk, target_column: list_pk}
+                    )
+                    for course_pk, list_pk in desired
+                ],
+                ignore_conflicts=True,
+            )
+            linked += len(desired)
+        stats = {"course_lists": {"linked": linked, "unlinked": 0}}
+        RelationLinker.report(stats)
+        self.count_rows(stats)
+
+    def count_rows(self, stats: Dict[str, Dict[str, int]]) -> None:
+        for counts in stats.values():
+            self.rows_written += sum(
+                count for name, count in counts.items() if name != "skipped"
+            )
@@ -0,0 +1,329 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import random
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+IT_SUBJECT = "Информационные технологии"
+RUBRICATOR_PATH = "/rubricator.json"
+API_PATH = "/api"
+
+
+def add_catalog_arguments(parser) -> None:
+    parser.add_argument(
+        "--courses", type=int, default=1000, help="Число курсов в каталоге"
+    )
+    parser.add_argument(
+        "--categories", type=int, default=4, help="Число категорий"
+    )
+    parser.add_argument(
+        "--lists-per-category",
+        type=int,
+        default=5,
+        help="Число подкатегорий в каждой категории",
+    )
+    parser.add_argument(
+        "--max-reviews",
+        type=int,
+        default=30,
+        help="Максимум отзывов у одного курса",
+    )
+    parser.add_argument(
+        "--users", type=int, default=2000, help="Число пользователей"
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=20,
+        help="Средняя задержка ответа, мс",
+    )
+    parser.add_argument(
+        "--jitter-ms",
+        type=float,
+        default=10,
+        help="Разброс задержки ответа, мс",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Доля ответов с ошибкой 502",
+    )
+    parser.add_argument(
+        "--throttle-rate",
+        type=float,
+        default=0.0,
+        help="Доля ответов 429 Too Many Requests",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=1, help="Зерно генератора каталога"
+    )
+
+
+def catalog_options(options: Dict) -> Dict:
+    return {
+        "courses": options["courses"],
+        "categories": options["categories"],
+        "lists_per_category": options["lists_per_category"],
+        "max_reviews": options["max_reviews"],
+        "users": options["users"],
+        "latency": options["latency_ms"] / 1000,
+        "jitter": options["jitter_ms"] / 1000,
+        "error_rate": options["error_rate"],
+        "throttle_rate": options["throttle_rate"],
+        "seed": options["seed"],
+    }
+
+
+class FakeStepik:
+    def __init__(
+        self,
+        courses: int = 1000,
+        categories: int = 4,
+        lists_per_category: int = 5,
+        max_reviews: int = 30,
+        users: int = 2000,
+        page_size: int = 20,
+        latency: float = 0.02,
+        jitter: float = 0.01,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = 1,
+    ):
+        self.courses = courses
+        self.categories = categories
+        self.lists_per_category = lists_per_category
+        self.max_reviews = max_reviews
+        self.users = max(users, 1)
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.requests = {}
+        self.injected = {"errors": 0, "throttled": 0}
+        self.list_courses = self._build_list_courses()
+
+    def _rng(self, kind: str, item_id: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{item_id}")
+
+    def _date(self, rng: random.Random) -> str:
+        moment = self.epoch + timedelta(minutes=rng.randrange(500_000))
+        return moment.isoformat().replace("+00:00", "Z")
+
+    def _build_list_courses(self) -> Dict[int, List[int]]:
+        list_count = self.categories * self.lists_per_category
+        list_courses = {list_id: [] for list_id in range(1, list_count + 1)}
+        if not list_courses:
+            return list_courses
+        for course_id in range(1, self.courses + 1):
+            rng = self._rng("membership", course_id)
+            for list_id in rng.sample(
+                sorted(list_courses), min(len(list_courses), rng.randint(1, 3))
+            ):
+                list_courses[list_id].append(course_id)
+        return list_courses
+
+    def rubricator(self) -> Dict:
+        category_ids = list(range(1, self.categories + 1))
+        return {
+            "subjects": [
+                {"title": IT_SUBJECT, "meta_categories": category_ids},
+                {
+                    "title": "Другое",
+                    "meta_categories": [self.categories + 1],
+                },
+            ],
+            "meta_categories": [
+                {
+                    "id": category_id,
+                    "title": f"Категория {category_id}",
+                    "course_lists": list(
+                        range(
+                            (category_id - 1) * self.lists_per_category + 1,
+                            category_id * self.lists_per_category + 1,
+                        )
+                    ),
+                }
+                for category_id in category_ids
+            ]
+            + [
+                {
+                    "id": self.categories + 1,
+                    "title": "Вне каталога",
+                    "course_lists": [],
+                }
+            ],
+        }
+
+    def course_list(self, list_id: int) -> Optional[Dict]:
+        if list_id not in self.list_courses:
+            return None
+        return {
+            "id": list_id,
+            "title": f"Подкатегория {list_id}",
+            "description": f"Синтетическая подкатегория {list_id}",
+            "courses": self.list_courses[list_id],
+        }
+
+    def reviews_count(self, course_id: int) -> int:
+        return self._rng("reviews", course_id).randint(0, self.max_reviews)
+
+    def course(self, course_id: int) -> Optional[Dict]:
+        if not 1 <= course_id <= self.courses:
+            return None
+        rng = self._rng("course", course_id)
+        is_paid = rng.random() < 0.3
+        return {
+            "id": course_id,
+            "title": f"Курс {course_id}",
+            "slug": f"course-{course_id}",
+            "summary": f"Краткое описание курса {course_id}",
+            "description": "".join(
+                f"<p>Раздел {part} курса <b>{course_id}</b></p>"
+                for part in range(1, rng.randint(2, 6))
+            ),
+            "cover": "None",
+            "is_paid": is_paid,
+            "price": rng.randint(5, 100) * 100 if is_paid else None,
+            "learners_count": rng.randint(0, 100_000),
+            "time_to_complete": rng.choice([None, 3600 * rng.randint(1, 50)]),
+            "language": rng.choice(["ru", "en"]),
+            "is_active": True,
+            "is_public": True,
+            "is_featured": rng.random() < 0.05,
+            "reviews_count": self.reviews_count(course_id),
+            "authors": [rng.randint(1, self.users)],
+            "instructors": rng.sample(
+                range(1, self.users + 1), min(self.users, rng.randint(1, 3))
+            ),
+            "create_date": self._date(rng),
+            "update_date": self._date(rng),
+        }
+
+    def reviews(self, course_id: int) -> List[Dict]:
+        if not 1 <= course_id <= self.courses:
+            return []
+        rng = self._rng("course-reviews", course_id)
+        stride = self.max_reviews + 1
+        reviews = []
+        for index in range(self.reviews_count(course_id)):
+            created = self._date(rng)
+            reviews.append(
+                {
+                    "id": course_id * stride + index,
+                    "course": course_id,
+                    "user": rng.randint(1, self.users),
+                    "score": rng.randint(1, 5),
+                    "text": f"Отзыв {index} о курсе {course_id}",
+                    "create_date": created,
+                    "update_date": created,
+                }
+            )
+        return reviews
+
+    def user(self, user_id: int) -> Optional[Dict]:
+        if not 1 <= user_id <= self.users:
+            return None
+        return {
+            "id": user_id,
+            "full_name": f"Пользователь {user_id}",
+            "avatar": "",
+            "bio": f"О пользователе {user_id}",
+        }
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.inject_faults])
+        app.add_routes(
+            [
+                web.get(RUBRICATOR_PATH, self.handle_rubricator),
+                web.get(
+                    f"{API_PATH}/course-lists",
+                    self.by_ids("course-lists", self.course_list),
+                ),
+                web.get(
+                    f"{API_PATH}/courses", self.by_ids("courses", self.course)
+                ),
+                web.get(f"{API_PATH}/users", self.by_ids("users", self.user)),
+                web.get(f"{API_PATH}/course-reviews", self.handle_reviews),
+                web.get("/stats", self.handle_stats),
+            ]
+        )
+        return app
+
+    @web.middleware
+    async def inject_faults(self, request: web.Request, handler):
+        if request.path == "/stats":
+            return await handler(request)
+
+        endpoint = request.path.rstrip("/").rsplit("/", 1)[-1]
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(
+                max(
+                    0.0,
+                    self.random.uniform(
+                        self.latency - self.jitter, self.latency + self.jitter
+                    ),
+                )
+            )
+
+        roll = self.random.random()
+        if roll < self.throttle_rate:
+            self.injected["throttled"] += 1
+            return web.Response(
+                status=429, headers={"Retry-After": str(self.retry_after)}
+            )
+        if roll < self.throttle_rate + self.error_rate:
+            self.injected["errors"] += 1
+            return web.Response(status=502)
+        return await handler(request)
+
+    async def handle_rubricator(self, request: web.Request) -> web.Response:
+        return web.json_response(self.rubricator())
+
+    def by_ids(self, key: str, getter):
+        async def handler(request: web.Request) -> web.Response:
+            items = []
+            for item_id in request.query.getall("ids[]", []):
+                item = getter(int(item_id))
+                if item is not None:
+                    items.append(item)
+            return web.json_response(
+                {"meta": {"page": 1, "has_next": False}, key: items}
+            )
+
+        return handler
+
+    async def handle_reviews(self, request: web.Request) -> web.Response:
+        course_id = int(request.query.get("course", 0))
+        page = int(request.query.get("page", 1))
+        reviews = self.reviews(course_id)
+        start = (page - 1) * self.page_size
+        return web.json_response(
+            {
+                "meta": {
+                    "page": page,
+                    "has_next": start + self.page_size < len(reviews),
+                    "has_previous": page > 1,
+                },
+                "course-reviews": reviews[start: start + self.page_size],
+            }
+        )
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"requests": self.requests, "injected": self.injected}
+        )
+
+
+def run_server(options: Dict, host: str = "127.0.0.1", port: int = 8765):
+    web.run_app(
+        FakeStepik(**options).create_app(), host=host, port=port, print=None
+    )
@@ -0,0 +1,62 @@
+from datetime import timedelta
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+import time
+from typing import Dict, Iterable, Optional
+import uuid
+
+
+class ResponseCache:
+    def __init__(
+        self, directory: Path, ttl: Optional[timedelta] = timedelta(hours=24)
+    ):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.json.gz"
+
+    def get(self, key: str, ignore_ttl: bool = False) -> Optional[Dict]:
+        path = self.path(key)
+        try:
+            if not ignore_ttl and self.ttl is not None:
+                age = time.time() - path.stat().st_mtime
+                if age > self.ttl.total_seconds():
+                    self.misses += 1
+                    return None
+            data = json.loads(gzip.decompress(path.read_bytes()))
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def get_many(
+        self, keys: Iterable[str], ignore_ttl: bool = False
+    ) -> Dict[str, Dict]:
+        result = {}
+        for key in keys:
+            data = self.get(key, ignore_ttl)
+            if data is not None:
+                result[key] = data
+        return result
+
+    def set(self, key: str, data: Dict) -> None:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(
+            gzip.compress(json.dumps(data, ensure_ascii=False).encode())
+        )
+        os.replace(tmp_path, path)
+
+    def set_many(self, items: Dict[str, Dict]) -> None:
+        for key, data in items.items():
+            self.set(key, data)
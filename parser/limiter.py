@@ -0,0 +1,143 @@
+import asyncio
+from collections import deque
+from statistics import median
+import time
+
+OK = "ok"
+ERROR = "error"
+THROTTLED = "throttled"
+CANCELLED = "cancelled"
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        window: int = 50,
+        latency_factor: float = 2.0,
+        baseline_windows: int = 10,
+        max_error_rate: float = 0.05,
+        decrease_factor: float = 0.5,
+        log_interval: float = 10.0,
+    ):
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.window = window
+        self.latency_factor = latency_factor
+        self.max_error_rate = max_error_rate
+        self.decrease_factor = decrease_factor
+        self.log_interval = log_interval
+
+        self.in_flight = 0
+        self.waiters = deque()
+        self.latencies = deque(maxlen=window)
+        self.window_p95s = deque(maxlen=baseline_windows)
+        self.samples = 0
+        self.errors = 0
+        self.last_decrease = 0.0
+        self.last_log = time.monotonic()
+        self.history = [(self.last_log, int(self.limit))]
+
+    async def acquire(self) -> float:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    self._wake_waiters()
+                raise
+        self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started: float, outcome: str = OK) -> None:
+        now = time.monotonic()
+        self.in_flight -= 1
+        if outcome == CANCELLED:
+            self._wake_waiters()
+            return
+        self.latencies.append(now - started)
+
+        if outcome == THROTTLED:
+            self._decrease(now)
+        else:
+            self.samples += 1
+            if outcome == ERROR:
+                self.errors += 1
+            if self.samples >= self.window:
+                self._evaluate(now)
+
+        self._wake_waiters()
+        if now - self.last_log >= self.log_interval:
+            self.last_log = now
+            print(self.summary())
+
+    def p95(self) -> float:
+        if not self.latencies:
+            return 0.0
+        latencies = sorted(self.latencies)
+        return latencies[int(0.95 * (len(latencies) - 1))]
+
+    def summary(self) -> str:
+        return (
+            f"Параллельность: {int(self.limit)} "
+            f"(в работе {self.in_flight}, p95 {self.p95() * 1000:.0f} мс)"
+        )
+
+    def _evaluate(self, now: float) -> None:
+        p95 = self.p95()
+        error_rate = self.errors / self.samples
+        self.samples = 0
+        self.errors = 0
+
+        baseline = median(self.window_p95s) if self.window_p95s else p95
+        self.window_p95s.append(p95)
+
+        if (
+            error_rate > self.max_error_rate
+            or p95 > baseline * self.latency_factor
+        ):
+            self._decrease(now)
+        else:
+            self._set_limit(self.limit + 1, now)
+
+    def _decrease(self, now: float) -> None:
+        if now - self.last_decrease < self.p95():
+            return
+        self.last_decrease = now
+        self._set_limit(self.limit * self.decrease_factor, now)
+
+    def _set_limit(self, limit: float, now: float) -> None:
+        limit = max(self.min_limit, min(limit, self.max_limit))
+        if int(limit) != int(self.limit):
+            self.history.append((now, int(limit)))
+        self.limit = limit
+
+    def _wake_waiters(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+class RateLimiter:
+    def __init__(self, rate: float = None):
+        self.rate = rate
+        self.next_at = 0.0
+
+    async def acquire(self) -> None:
+        if not self.rate:
+            return
+        now = time.monotonic()
+        wait = self.next_at - now
+        self.next_at = max(now, self.next_at) + 1 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
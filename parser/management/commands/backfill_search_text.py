@@ -0,0 +1,106 @@
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    wait,
+)
+import multiprocessing
+import os
+import time
+from typing import Dict
+
+from django.core.management.base import BaseCommand
+
+from parser.models import Course
+from parser.text_normalizer import course_texts
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполнение текста для поиска и фрагментов описания у сохранённых "
+        "курсов в нескольких процессах"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Сколько курсов обрабатывать одним процессом за раз",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Число процессов",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересчитать текст у всех курсов, а не только у пустых",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Псевдоним базы данных",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        chunk_size = options["chunk_size"]
+        workers = max(1, options["workers"] or 1)
+        courses = Course.objects.using(using)
+        if not options["all"]:
+            courses = courses.filter(search_text="")
+        pks = list(courses.order_by("pk").values_list("pk", flat=True))
+        if not pks:
+            self.stdout.write("Все курсы уже проиндексированы")
+            return
+
+        started = time.monotonic()
+        saved = 0
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            pending = {}
+            for i in range(0, len(pks), chunk_size):
+                rows = list(
+                    Course.objects.using(using)
+                    .filter(pk__in=pks[i: i + chunk_size])
+                    .order_by("pk")
+                    .values_list("pk", "title", "summary", "description")
+                )
+                future = pool.submit(
+                    course_texts, [tuple(row[1:]) for row in rows]
+                )
+                pending[future] = [row[0] for row in rows]
+                if len(pending) >= workers * 2:
+                    saved += self.save(pending, using, FIRST_COMPLETED)
+                    self.stdout.write(f"Обработано курсов: {saved}")
+            saved += self.save(pending, using, ALL_COMPLETED)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Обработано курсов: {saved} за {elapsed:.2f} с "
+                f"({saved / max(elapsed, 1e-9):.1f}/с)"
+            )
+        )
+
+    def save(self, pending: Dict, using: str, return_when: str) -> int:
+        finished, _ = wait(pending, return_when=return_when)
+        saved = 0
+        for future in finished:
+            pks = pending.pop(future)
+            Course.objects.using(using).bulk_update(
+                [
+                    Course(pk=pk, search_text=search_text, snippet=snippet)
+                    for pk, (search_text, snippet) in zip(
+                        pks, future.result()
+                    )
+                ],
+                ["search_text", "snippet"],
+            )
+            saved += len(pks)
+        return saved
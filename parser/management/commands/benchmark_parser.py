@@ -0,0 +1,162 @@
+import asyncio
+import contextlib
+import multiprocessing
+import os
+from pathlib import Path
+import resource
+import socket
+import sys
+import tempfile
+import time
+
+import aiohttp
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from parser.crawl_options import (
+    add_concurrency_arguments,
+    concurrency_options,
+)
+from parser.fake_stepik import (
+    add_catalog_arguments,
+    API_PATH,
+    catalog_options,
+    RUBRICATOR_PATH,
+    run_server,
+)
+from parser.stepik_parser import StepikParser
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_server(url: str, timeout: float = 10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(url) as response:
+                    return await response.json()
+            except aiohttp.ClientError:
+                if time.monotonic() > deadline:
+                    raise CommandError(f"Сервер {url} не запустился")
+                await asyncio.sleep(0.1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Замер производительности парсера на локальном заменителе API Stepik "
+        "во временной базе данных"
+    )
+
+    def add_arguments(self, parser):
+        add_catalog_arguments(parser)
+        add_concurrency_arguments(parser)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Размер пачки для массовой записи в БД",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Отключить дельта-обход",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=1,
+            help="Сколько раз подряд запускать парсер на одной базе",
+        )
+
+    def handle(self, *args, **options):
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = multiprocessing.get_context("spawn").Process(
+            target=run_server,
+            args=(catalog_options(options), "127.0.0.1", port),
+            daemon=True,
+        )
+        server.start()
+
+        old_name = connection.settings_dict["NAME"]
+        with tempfile.TemporaryDirectory() as directory:
+            connection.settings_dict["TEST"]["NAME"] = str(
+                Path(directory) / "benchmark.sqlite3"
+            )
+            try:
+                asyncio.run(wait_for_server(f"{base_url}/stats"))
+                connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True, serialize=False
+                )
+                for run in range(1, options["runs"] + 1):
+                    self.benchmark(run, base_url, options)
+                self.report_server(
+                    asyncio.run(wait_for_server(f"{base_url}/stats"))
+                )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                server.terminate()
+                server.join()
+
+    def benchmark(self, run: int, base_url: str, options: dict) -> None:
+        parser = StepikParser(
+            **concurrency_options(options),
+            chunk_size=options["chunk_size"],
+            delta=not options["full"],
+            api_url=f"{base_url}{API_PATH}",
+            rubricator_url=f"{base_url}{RUBRICATOR_PATH}",
+        )
+
+        quiet = options["verbosity"] < 2
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(
+            devnull if quiet else sys.stdout
+        ):
+            started = time.monotonic()
+            asyncio.run(parser.parse())
+            elapsed = time.monotonic() - started
+
+        courses = parser.writer.written
+        requests = parser.metrics.requests
+        errors = parser.metrics.errors
+        rows = parser.writer.rows_written
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        self.stdout.write(self.style.SUCCESS(f"Запуск {run}: {elapsed:.2f} с"))
+        self.stdout.write(
+            f"  курсов: {courses} ({courses / elapsed:.1f}/с)\n"
+            f"  запросов: {requests} ({requests / elapsed:.1f}/с), "
+            f"ошибок: {errors}\n"
+            f"  записей в БД: {rows} ({rows / elapsed:.1f}/с)\n"
+            f"  пиковый RSS: {peak_rss:.1f} МБ\n"
+            f"  {parser.client.limiter.summary()}"
+        )
+        self.stdout.write(
+            "  этапы: "
+            + ", ".join(
+                f"{phase} {seconds:.2f} с"
+                for phase, seconds in parser.metrics.phases.items()
+            )
+        )
+        self.stdout.write(
+            "  БД: "
+            + ", ".join(
+                f"{name} {seconds:.2f} с"
+                for name, seconds in parser.writer.db_timings().items()
+            )
+        )
+
+    def report_server(self, stats: dict) -> None:
+        self.stdout.write(
+            "Сервер: "
+            + ", ".join(
+                f"{endpoint}: {count}"
+                for endpoint, count in sorted(stats["requests"].items())
+            )
+            + f"; внесено ошибок: {stats['injected']['errors']}, "
+            f"429: {stats['injected']['throttled']}"
+        )
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parser.crawl_options import add_crawl_arguments, crawl_options
+from parser.models import CrawlRun
+from parser.shard_worker import ShardWorker
+from parser.stepik_parser import StepikParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Обработчик задач распределённого обхода Stepik: берёт задачи "
+        "запуска в аренду и обрабатывает их до опустошения очереди"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--run-id",
+            type=int,
+            default=None,
+            help="ID запуска (по умолчанию — текущий активный)",
+        )
+        add_crawl_arguments(parser)
+        parser.add_argument(
+            "--poll-seconds",
+            type=float,
+            default=5,
+            help="Пауза между проверками очереди задач",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Псевдоним базы данных для записи каталога",
+        )
+
+    def handle(self, *args, **options):
+        parser = StepikParser(
+            **crawl_options(options), using=options["database"]
+        )
+        worker = ShardWorker(
+            parser,
+            options["run_id"],
+            lease=timedelta(seconds=options["lease_seconds"]),
+            poll_interval=options["poll_seconds"],
+        )
+        try:
+            tasks = asyncio.run(worker.run())
+        except CrawlRun.DoesNotExist:
+            raise CommandError("Нет активного запуска для обработки")
+        except KeyboardInterrupt:
+            self.stdout.write(
+                self.style.WARNING("\nОбработчик остановлен пользователем\n")
+            )
+            return
+        self.stdout.write(self.style.SUCCESS(f"Выполнено задач: {tasks}"))
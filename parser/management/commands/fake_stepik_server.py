@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from parser.fake_stepik import (
+    add_catalog_arguments,
+    API_PATH,
+    catalog_options,
+    RUBRICATOR_PATH,
+    run_server,
+)
+
+
+class Command(BaseCommand):
+    help = "Локальный заменитель API Stepik с синтетическим каталогом"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Адрес")
+        parser.add_argument("--port", type=int, default=8765, help="Порт")
+        add_catalog_arguments(parser)
+
+    def handle(self, *args, **options):
+        base_url = f"http://{options['host']}:{options['port']}"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"API: {base_url}{API_PATH}, "
+                f"рубрикатор: {base_url}{RUBRICATOR_PATH}"
+            )
+        )
+        try:
+            run_server(
+                catalog_options(options), options["host"], options["port"]
+            )
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parser.dump_import import DUMP_TYPES, DumpError, DumpImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковый импорт выгрузок API Stepik из файлов JSON или NDJSON "
+        "(в том числе .gz)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths", nargs="+", type=Path, help="Файлы выгрузки"
+        )
+        parser.add_argument(
+            "--type",
+            choices=DUMP_TYPES,
+            default="courses",
+            help="Тип записей, если в файле объекты без обёртки ответа API",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько записей накапливать перед записью в БД",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Размер пачки для массовой записи в БД",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Псевдоним базы данных",
+        )
+
+    def handle(self, *args, **options):
+        for path in options["paths"]:
+            if not path.is_file():
+                raise CommandError(f"Файл {path} не найден")
+
+        importer = DumpImporter(
+            options["batch_size"], options["chunk_size"], options["database"]
+        )
+        try:
+            for path in options["paths"]:
+                self.stdout.write(f"Импорт {path}")
+                importer.import_file(path, options["type"])
+        except DumpError as e:
+            raise CommandError(f"{path}: {e}")
+        except KeyboardInterrupt:
+            self.stdout.write(
+                self.style.WARNING("\nИмпорт прерван пользователем\n")
+            )
+            return
+        totals = importer.finish()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импортировано записей: {importer.records} "
+                f"({importer.rate():.1f}/с), записей в БД: "
+                f"{totals['rows_written']}"
+            )
+        )
+        self.stdout.write(
+            ", ".join(f"{name}: {count}" for name, count in totals.items())
+        )
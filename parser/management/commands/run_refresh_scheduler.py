@@ -0,0 +1,120 @@
+import asyncio
+from datetime import timedelta
+import time
+
+from django.core.management.base import BaseCommand
+
+from parser.checkpoints import CrawlLocked
+from parser.crawl_options import (
+    add_concurrency_arguments,
+    concurrency_options,
+)
+from parser.scheduler import RefreshPolicy
+from parser.stepik_parser import StepikParser
+
+
+class Command(BaseCommand):
+    help = (
+        "Планировщик обновлений: популярные курсы обновляются чаще, "
+        "каталог целиком обходится реже"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hot-hours",
+            type=float,
+            default=6,
+            help="Интервал обновления популярных и часто меняющихся курсов",
+        )
+        parser.add_argument(
+            "--warm-hours",
+            type=float,
+            default=72,
+            help="Интервал обновления курсов средней популярности",
+        )
+        parser.add_argument(
+            "--cold-hours",
+            type=float,
+            default=336,
+            help="Интервал обновления остальных курсов",
+        )
+        parser.add_argument(
+            "--discovery-hours",
+            type=float,
+            default=168,
+            help="Интервал полного обхода рубрикатора и подкатегорий",
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=0.1,
+            help="Случайный разброс интервалов (доля)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько курсов обновлять за один проход",
+        )
+        parser.add_argument(
+            "--poll-seconds",
+            type=float,
+            default=300,
+            help="Пауза между проверками очереди обновлений",
+        )
+        add_concurrency_arguments(parser)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить один проход и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        policy = RefreshPolicy(
+            {
+                "hot": timedelta(hours=options["hot_hours"]),
+                "warm": timedelta(hours=options["warm_hours"]),
+                "cold": timedelta(hours=options["cold_hours"]),
+            },
+            discovery_interval=timedelta(hours=options["discovery_hours"]),
+            jitter=options["jitter"],
+        )
+        self.stdout.write(self.style.SUCCESS("Планировщик запущен"))
+        try:
+            while True:
+                self.tick(policy, options)
+                if options["once"]:
+                    break
+                time.sleep(options["poll_seconds"])
+        except KeyboardInterrupt:
+            self.stdout.write(
+                self.style.WARNING("\nПланировщик остановлен пользователем\n")
+            )
+
+    def tick(self, policy: RefreshPolicy, options: dict) -> None:
+        try:
+            if policy.discovery_due():
+                self.stdout.write("Полный обход каталога")
+                asyncio.run(self.make_parser(options).parse())
+                self.report_tiers(policy.assign())
+
+            course_ids = policy.due_course_ids(options["batch_size"])
+            if course_ids:
+                self.stdout.write(f"Обновление курсов: {len(course_ids)}")
+                asyncio.run(self.make_parser(options).parse(course_ids))
+                self.report_tiers(policy.assign(course_ids))
+        except CrawlLocked as e:
+            self.stdout.write(
+                self.style.WARNING(f"{e}, повтор при следующей проверке")
+            )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Ошибка: {e}"))
+
+    def make_parser(self, options: dict) -> StepikParser:
+        return StepikParser(**concurrency_options(options))
+
+    def report_tiers(self, counts: dict) -> None:
+        self.stdout.write(
+            "Курсов по частоте обновления: "
+            + ", ".join(f"{tier} {count}" for tier, count in counts.items())
+        )
@@ -1,33 +1,227 @@
 from django.core.management.base import BaseCommand
 
 import asyncio
+from typing import List, Optional
 
-from parser.stepik_parser import StepikParser
+from parser.checkpoints import Checkpointer, CrawlLocked, release_run
+from parser.crawl_options import (
+    add_crawl_arguments,
+    crawl_arguments,
+    crawl_options,
+)
+from parser.models import CrawlRun
+from parser.sources import (
+    FakeOpenEduAdapter,
+    OPENEDU_API_URL,
+    OPENEDU_FIXTURES,
+    OpenEduAdapter,
+    SourceAdapter,
+)
+from parser.staging import StagingDatabase, StagingInvalid
+from parser.stepik_parser import (
+    CATEGORIES_NUMS_URL,
+    StepikParser,
+)
 
 
 class Command(BaseCommand):
     help = "Запуск парсера курсов Stepik"
 
+    def add_arguments(self, parser):
+        add_crawl_arguments(parser)
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Продолжить последний незавершённый запуск, "
+            "пропуская уже записанные курсы",
+        )
+        parser.add_argument(
+            "--run-id",
+            type=int,
+            default=None,
+            help="ID заранее созданного запуска (для запуска из админки)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Разбить обход на задачи и запустить столько обработчиков "
+            "crawl_worker (0 — только внешние обработчики)",
+        )
+        parser.add_argument(
+            "--task-size",
+            type=int,
+            default=200,
+            help="Число курсов в одной задаче",
+        )
+        parser.add_argument(
+            "--no-reconcile",
+            action="store_true",
+            help="Не помечать удалёнными курсы, подкатегории и отзывы, "
+            "пропавшие из каталога",
+        )
+        parser.add_argument(
+            "--max-removed-ratio",
+            type=float,
+            default=0.1,
+            help="Не выполнять сверку, если из каталога пропала "
+            "большая доля курсов",
+        )
+        parser.add_argument(
+            "--staging",
+            action="store_true",
+            help="Писать в промежуточную базу и подменять ею рабочий "
+            "каталог только после успешной проверки",
+        )
+        parser.add_argument(
+            "--openedu",
+            action="store_true",
+            help="Параллельно загрузить каталог OpenEdu",
+        )
+        parser.add_argument(
+            "--openedu-url",
+            default=OPENEDU_API_URL,
+            help="Адрес API курсов OpenEdu",
+        )
+        parser.add_argument(
+            "--openedu-fixtures",
+            nargs="?",
+            const=str(OPENEDU_FIXTURES),
+            default=None,
+            help="Брать курсы OpenEdu из локального файла фикстур",
+        )
+        parser.add_argument(
+            "--rubricator-url",
+            default=CATEGORIES_NUMS_URL,
+            help="Адрес рубрикатора Stepik",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS("Запуск парсера..."))
+        if not options["staging"]:
+            self.crawl(options, "default")
+            return
+
+        if options["run_id"] is None:
+            try:
+                run = Checkpointer.start(resume=options["resume"]).run
+            except CrawlLocked as e:
+                self.stdout.write(self.style.ERROR(f"Ошибка: {e}"))
+                return
+            options["run_id"] = run.pk
+        else:
+            run = CrawlRun.objects.get(pk=options["run_id"])
+        try:
+            staging = StagingDatabase(max_drop=options["max_removed_ratio"])
+            if staging.prepare(reuse=options["resume"]):
+                self.stdout.write("Создана промежуточная база из рабочей")
+            else:
+                self.stdout.write("Продолжаем запись в промежуточную базу")
+            parser = self.crawl(options, staging.alias)
+            if parser is not None:
+                self.publish(parser, staging)
+        finally:
+            release_run(run)
+
+    def crawl(self, options: dict, using: str) -> Optional[StepikParser]:
         try:
-            asyncio.run(self.start_parsing())
+            return asyncio.run(self.start_parsing(options, using))
         except KeyboardInterrupt:
             self.stdout.write(
                 self.style.WARNING("\nПарсинг остановлен пользователем\n")
             )
+            return None
 
-    async def start_parsing(self):
-        parser = StepikParser(10)
-
+    def publish(self, parser: StepikParser, staging: StagingDatabase):
+        checkpointer = parser.writer and parser.writer.checkpointer
+        if checkpointer is None or checkpointer.run.status != "finished":
+            self.stdout.write(
+                self.style.WARNING(
+                    "Запуск не завершён, промежуточная база сохранена "
+                    "для продолжения (--staging --resume)"
+                )
+            )
+            return
         try:
-            courses_data, course_ids = await parser.parse()
+            counts = staging.validate()
+        except StagingInvalid as e:
             self.stdout.write(
-                self.style.SUCCESS(
-                    f"Успешно спарсил {len(course_ids)} курсов со Stepik"
+                self.style.ERROR(
+                    f"Промежуточная база не прошла проверку: {e}. "
+                    f"Рабочий каталог не изменён, база: {staging.path}"
+                )
+            )
+            return
+        staging.swap()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Каталог опубликован: "
+                + ", ".join(
+                    f"{name} {count}" for name, count in counts.items()
                 )
             )
+        )
+
+    def worker_options(self, options: dict, using: str) -> List[str]:
+        return crawl_arguments(options) + ["--database", using]
+
+    def sources(self, options: dict) -> List[SourceAdapter]:
+        if options["openedu_fixtures"]:
+            return [FakeOpenEduAdapter(options["openedu_fixtures"])]
+        if options["openedu"]:
+            return [OpenEduAdapter(options["openedu_url"])]
+        return []
+
+    async def start_parsing(
+        self, options: dict, using: str
+    ) -> StepikParser:
+        parser = StepikParser(
+            **crawl_options(options),
+            resume=options["resume"],
+            run_id=options["run_id"],
+            rubricator_url=options["rubricator_url"],
+            workers=options["workers"],
+            task_size=options["task_size"],
+            worker_options=self.worker_options(options, using),
+            reconcile=not options["no_reconcile"],
+            max_removed_ratio=options["max_removed_ratio"],
+            using=using,
+            sources=self.sources(options),
+            keep_lock=options["staging"],
+        )
+
+        try:
+            await parser.parse()
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Ошибка: {e}"))
-        finally:
-            await parser.session.close()
+            return parser
+        self.report_run(parser)
+        return parser
+
+    def report_run(self, parser: StepikParser) -> None:
+        checkpointer = parser.writer and parser.writer.checkpointer
+        if checkpointer is None:
+            self.stdout.write(self.style.ERROR("Запуск не начат"))
+            return
+        run = checkpointer.run
+        done = f"обработано курсов {run.courses_done} из {run.courses_total}"
+        if run.status == "finished":
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Успешно спарсил {run.courses_total} курсов со Stepik"
+                )
+            )
+        elif run.status in ("cancelled", "interrupted"):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Запуск {run.pk} {run.get_status_display().lower()}: "
+                    f"{done}"
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"Запуск {run.pk} завершился со статусом "
+                    f"«{run.get_status_display()}»: {done}"
+                )
+            )
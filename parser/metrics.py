@@ -0,0 +1,100 @@
+from bisect import bisect_left
+import time
+from typing import Dict
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+HISTOGRAM_LABELS = [f"≤{bound}" for bound in LATENCY_BUCKETS_MS] + [
+    f">{LATENCY_BUCKETS_MS[-1]}"
+]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency = 0.0
+        self.histogram = [0] * len(HISTOGRAM_LABELS)
+
+    def observe(self, seconds: float, size: int, error: bool) -> None:
+        self.requests += 1
+        self.errors += error
+        self.bytes += size
+        self.latency += seconds
+        self.histogram[bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+
+    def as_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "avg_ms": round(self.latency * 1000 / max(self.requests, 1), 1),
+            "histogram_ms": dict(zip(HISTOGRAM_LABELS, self.histogram)),
+        }
+
+
+class CrawlMetrics:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.endpoints = {}
+        self.phases = {}
+        self.phase = None
+        self.phase_started = None
+
+    def endpoint(self, name: str) -> EndpointStats:
+        if name not in self.endpoints:
+            self.endpoints[name] = EndpointStats()
+        return self.endpoints[name]
+
+    def observe_request(
+        self,
+        endpoint: str,
+        seconds: float,
+        size: int = 0,
+        error: bool = False,
+    ) -> None:
+        self.endpoint(endpoint).observe(seconds, size, error)
+
+    @property
+    def requests(self) -> int:
+        return sum(stats.requests for stats in self.endpoints.values())
+
+    @property
+    def errors(self) -> int:
+        return sum(stats.errors for stats in self.endpoints.values())
+
+    def start_phase(self, phase: str) -> None:
+        self.end_phase()
+        self.phase = phase
+        self.phase_started = time.monotonic()
+
+    def end_phase(self) -> None:
+        if self.phase is None:
+            return
+        self.phases[self.phase] = (
+            self.phases.get(self.phase, 0.0)
+            + time.monotonic()
+            - self.phase_started
+        )
+        self.phase = None
+
+    def report(self, db_time: Dict[str, float], **totals) -> Dict:
+        return {
+            "elapsed": round(time.monotonic() - self.started, 3),
+            "phases": {
+                phase: round(seconds, 3)
+                for phase, seconds in self.phases.items()
+            },
+            "endpoints": {
+                name: stats.as_dict()
+                for name, stats in sorted(self.endpoints.items())
+            },
+            "network_time": round(
+                sum(stats.latency for stats in self.endpoints.values()), 3
+            ),
+            "db_time": {
+                name: round(seconds, 3) for name, seconds in db_time.items()
+            },
+            "db_total": round(sum(db_time.values()), 3),
+            "totals": totals,
+        }
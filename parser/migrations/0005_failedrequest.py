@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0004_course_platform_alter_course_language_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FailedRequest",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Создано"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Изменено"
+                    ),
+                ),
+                (
+                    "endpoint",
+                    models.CharField(max_length=100, verbose_name="Эндпоинт"),
+                ),
+                ("url", models.TextField(verbose_name="Адрес запроса")),
+                (
+                    "ids",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        verbose_name="ID запрошенных объектов",
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                (
+                    "attempts",
+                    models.IntegerField(default=0, verbose_name="Попыток"),
+                ),
+            ],
+            options={
+                "verbose_name": "Неудачный запрос",
+                "verbose_name_plural": "Неудачные запросы",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0005_failedrequest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="payload_hash",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="Хэш данных с запроса"
+            ),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="payload_hash",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="Хэш данных с запроса"
+            ),
+        ),
+        migrations.AddField(
+            model_name="stepikuser",
+            name="payload_hash",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="Хэш данных с запроса"
+            ),
+        ),
+    ]
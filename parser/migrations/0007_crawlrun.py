@@ -0,0 +1,130 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0006_payload_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CrawlRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Создано"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Изменено"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Выполняется"),
+                            ("finished", "Завершён"),
+                            ("failed", "Ошибка"),
+                            ("interrupted", "Прерван"),
+                        ],
+                        default="running",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "phase",
+                    models.CharField(
+                        choices=[
+                            ("categories", "Категории"),
+                            ("lists", "Подкатегории"),
+                            ("courses", "Курсы"),
+                            ("finished", "Завершено"),
+                        ],
+                        default="categories",
+                        max_length=20,
+                        verbose_name="Этап",
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Завершён"
+                    ),
+                ),
+                (
+                    "courses_done",
+                    models.IntegerField(
+                        default=0, verbose_name="Обработано курсов"
+                    ),
+                ),
+                (
+                    "completed_list_ids",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        verbose_name="Обработанные подкатегории",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Запуск парсера",
+                "verbose_name_plural": "Запуски парсера",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="CrawlCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "course_external_id",
+                    models.IntegerField(verbose_name="ID курса на Stepik"),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="checkpoints",
+                        to="parser.crawlrun",
+                        verbose_name="Запуск",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Обработанный курс",
+                "verbose_name_plural": "Обработанные курсы",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("run", "course_external_id"),
+                        name="unique_crawl_checkpoint",
+                    )
+                ],
+            },
+        ),
+    ]
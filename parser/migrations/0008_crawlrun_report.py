@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0007_crawlrun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="crawlrun",
+            name="report",
+            field=models.JSONField(
+                blank=True, default=dict, verbose_name="Отчёт"
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0008_crawlrun_report"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="crawlrun",
+            name="cancel_requested",
+            field=models.BooleanField(
+                default=False, verbose_name="Запрошена отмена"
+            ),
+        ),
+        migrations.AddField(
+            model_name="crawlrun",
+            name="courses_total",
+            field=models.IntegerField(default=0, verbose_name="Всего курсов"),
+        ),
+        migrations.AddField(
+            model_name="crawlrun",
+            name="lock",
+            field=models.BooleanField(
+                editable=False,
+                null=True,
+                unique=True,
+                verbose_name="Блокировка",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="crawlrun",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("queued", "В очереди"),
+                    ("running", "Выполняется"),
+                    ("finished", "Завершён"),
+                    ("failed", "Ошибка"),
+                    ("interrupted", "Прерван"),
+                    ("cancelled", "Отменён"),
+                ],
+                default="running",
+                max_length=20,
+                verbose_name="Статус",
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0009_crawlrun_lock"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="next_refresh_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                null=True,
+                verbose_name="Следующее обновление",
+            ),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="refresh_tier",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("hot", "Часто"),
+                    ("warm", "Умеренно"),
+                    ("cold", "Редко"),
+                ],
+                max_length=10,
+                verbose_name="Частота обновления",
+            ),
+        ),
+        migrations.AddField(
+            model_name="crawlrun",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("full", "Полный обход"),
+                    ("refresh", "Обновление курсов"),
+                ],
+                default="full",
+                max_length=20,
+                verbose_name="Тип",
+            ),
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0010_refresh_tiers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CrawlTask",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Создано"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Изменено"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Ожидает"),
+                            ("leased", "В работе"),
+                            ("done", "Выполнена"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "course_ids",
+                    models.JSONField(default=list, verbose_name="ID курсов"),
+                ),
+                (
+                    "course_lists",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        verbose_name="Подкатегории курсов",
+                    ),
+                ),
+                (
+                    "force_ids",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        verbose_name="Курсы без дельта-проверки",
+                    ),
+                ),
+                (
+                    "worker",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="Обработчик"
+                    ),
+                ),
+                (
+                    "lease_expires_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Аренда до"
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.IntegerField(default=0, verbose_name="Попыток"),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tasks",
+                        to="parser.crawlrun",
+                        verbose_name="Запуск",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Задача обхода",
+                "verbose_name_plural": "Задачи обхода",
+                "ordering": ["pk"],
+                "indexes": [
+                    models.Index(
+                        fields=["run", "status", "lease_expires_at"],
+                        name="crawl_task_claim_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0011_crawltask"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="removed_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                null=True,
+                verbose_name="Удалено на Stepik",
+            ),
+        ),
+        migrations.AddField(
+            model_name="courselist",
+            name="removed_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                null=True,
+                verbose_name="Удалено на Stepik",
+            ),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="removed_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                null=True,
+                verbose_name="Удалено на Stepik",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="crawlrun",
+            name="phase",
+            field=models.CharField(
+                choices=[
+                    ("categories", "Категории"),
+                    ("lists", "Подкатегории"),
+                    ("courses", "Курсы"),
+                    ("reconcile", "Сверка"),
+                    ("finished", "Завершено"),
+                ],
+                default="categories",
+                max_length=20,
+                verbose_name="Этап",
+            ),
+        ),
+    ]
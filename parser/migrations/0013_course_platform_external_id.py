@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0012_removed_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="course",
+            name="external_id",
+            field=models.IntegerField(
+                db_index=True, verbose_name="ID на платформе"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="course",
+            constraint=models.UniqueConstraint(
+                fields=("platform", "external_id"),
+                name="unique_course_per_platform",
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0013_course_platform_external_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="search_text",
+            field=models.TextField(
+                blank=True, editable=False, verbose_name="Текст для поиска"
+            ),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="snippet",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=300,
+                verbose_name="Фрагмент описания",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0014_course_search_text"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="crawltask",
+            name="incomplete_fetches",
+            field=models.IntegerField(
+                default=0, verbose_name="Не получено объектов"
+            ),
+        ),
+    ]
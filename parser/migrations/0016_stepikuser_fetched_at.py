@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:35
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_updated_at(apps, schema_editor):
+    apps.get_model("parser", "StepikUser").objects.using(
+        schema_editor.connection.alias
+    ).update(fetched_at=F("updated_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0015_crawltask_incomplete_fetches"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stepikuser",
+            name="fetched_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                null=True,
+                verbose_name="Получен со Stepik",
+            ),
+        ),
+        migrations.RunPython(copy_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:58
+
+from django.db import migrations
+
+from parser.text_normalizer import course_texts
+
+CHUNK_SIZE = 500
+
+
+def backfill_search_text(apps, schema_editor):
+    Course = apps.get_model("parser", "Course")
+    courses = Course.objects.using(schema_editor.connection.alias)
+    pks = list(
+        courses.filter(search_text="")
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    while pks:
+        chunk, pks = pks[:CHUNK_SIZE], pks[CHUNK_SIZE:]
+        rows = list(
+            courses.filter(pk__in=chunk).only(
+                "pk", "title", "summary", "description"
+            )
+        )
+        texts = course_texts(
+            [(row.title, row.summary, row.description) for row in rows]
+        )
+        for row, (search_text, snippet) in zip(rows, texts):
+            row.search_text = search_text
+            row.snippet = snippet
+        courses.bulk_update(rows, ["search_text", "snippet"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0016_stepikuser_fetched_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:05
+
+from django.db import migrations, models
+
+from parser.normalizers import course_content_hash, openedu_content_hash
+
+CHUNK_SIZE = 500
+CONTENT_HASHES = {
+    "stepik": course_content_hash,
+    "openedu": openedu_content_hash,
+}
+
+
+def fill_content_hash(apps, schema_editor):
+    Course = apps.get_model("parser", "Course")
+    courses = Course.objects.using(schema_editor.connection.alias)
+    pks = list(courses.order_by("pk").values_list("pk", flat=True))
+    while pks:
+        chunk, pks = pks[:CHUNK_SIZE], pks[CHUNK_SIZE:]
+        rows = list(
+            courses.filter(pk__in=chunk).only("pk", "platform", "raw_data")
+        )
+        for row in rows:
+            row.content_hash = CONTENT_HASHES[row.platform](row.raw_data)
+        courses.bulk_update(rows, ["content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0017_backfill_search_text"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="content_changed_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Изменено содержимое"
+            ),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="content_hash",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="Хэш содержимого курса"
+            ),
+        ),
+        migrations.RunPython(fill_content_hash, migrations.RunPython.noop),
+    ]
@@ -21,17 +21,32 @@ class ExternalEntityModel(TimestampedModel):
         abstract = True
 
 
+class PayloadEntityModel(ExternalEntityModel):
+    payload_hash = models.CharField(
+        max_length=64, blank=True, verbose_name="Хэш данных с запроса"
+    )
+
+    class Meta:
+        abstract = True
+
+
 class CourseQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(
+            is_active=True, is_public=True, removed_at__isnull=True
+        )
+
     def with_rating(self):
+        present = models.Q(reviews__removed_at__isnull=True)
         return self.annotate(
             rating_avg=Round(
-                models.Avg("reviews__score"),
+                models.Avg("reviews__score", filter=present),
                 0,
                 output_field=models.DecimalField(
                     max_digits=3, decimal_places=2
                 ),
             ),
-            reviews_count_calc=models.Count("reviews"),
+            reviews_count_calc=models.Count("reviews", filter=present),
         )
 
 
@@ -39,6 +54,9 @@ class CourseManager(models.Manager):
     def get_queryset(self):
         return CourseQuerySet(self.model, using=self._db)
 
+    def active(self):
+        return self.get_queryset().active()
+
     def with_rating(self):
         return self.get_queryset().with_rating()
 
@@ -65,6 +83,12 @@ class CourseList(ExternalEntityModel):
         null=True,
         blank=True,
     )
+    removed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Удалено на Stepik",
+    )
 
     class Meta:
         verbose_name = "Подкатегория"
@@ -74,7 +98,7 @@ class CourseList(ExternalEntityModel):
         return self.title
 
 
-class StepikUser(ExternalEntityModel):
+class StepikUser(PayloadEntityModel):
     full_name = models.CharField(
         max_length=500, blank=True, verbose_name="ФИО"
     )
@@ -85,6 +109,12 @@ class StepikUser(ExternalEntityModel):
     details = models.JSONField(
         default=dict, blank=True, verbose_name="Дополнительная информация"
     )
+    fetched_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Получен со Stepik",
+    )
 
     class Meta:
         verbose_name = "Пользователь на Stepik"
@@ -94,7 +124,7 @@ class StepikUser(ExternalEntityModel):
         return self.full_name or f"Пользователь {self.external_id}"
 
 
-class Course(ExternalEntityModel):
+class Course(PayloadEntityModel):
     PLATFORM_CHOICES = [
         ("stepik", "Stepik"),
         ("openedu", "OpenEdu"),
@@ -103,11 +133,28 @@ class Course(ExternalEntityModel):
         ("ru", "Русский"),
         ("en", "Английский"),
     ]
+    REFRESH_TIER_CHOICES = [
+        ("hot", "Часто"),
+        ("warm", "Умеренно"),
+        ("cold", "Редко"),
+    ]
 
+    external_id = models.IntegerField(
+        db_index=True, verbose_name="ID на платформе"
+    )
     title = models.CharField(max_length=500, verbose_name="Курс")
     slug = models.SlugField(max_length=500, blank=True, verbose_name="Слаг")
     description = models.TextField(blank=True, verbose_name="Описание")
     summary = models.TextField(blank=True, verbose_name="О курсе")
+    search_text = models.TextField(
+        blank=True, editable=False, verbose_name="Текст для поиска"
+    )
+    snippet = models.CharField(
+        max_length=300,
+        blank=True,
+        editable=False,
+        verbose_name="Фрагмент описания",
+    )
     cover = models.URLField(
         blank=True, max_length=1000, verbose_name="Обложка"
     )
@@ -166,6 +213,32 @@ class Course(ExternalEntityModel):
     raw_data = models.JSONField(
         default=dict, blank=True, verbose_name="Данные с запроса"
     )
+    content_hash = models.CharField(
+        max_length=64, blank=True, verbose_name="Хэш содержимого курса"
+    )
+    content_changed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Изменено содержимое",
+    )
+    refresh_tier = models.CharField(
+        max_length=10,
+        choices=REFRESH_TIER_CHOICES,
+        blank=True,
+        verbose_name="Частота обновления",
+    )
+    next_refresh_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Следующее обновление",
+    )
+    removed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Удалено на Stepik",
+    )
 
     objects = CourseManager()
 
@@ -173,17 +246,33 @@ class Course(ExternalEntityModel):
         ordering = ["-learners_count"]
         verbose_name = "Курс"
         verbose_name_plural = "Курсы"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["platform", "external_id"],
+                name="unique_course_per_platform",
+            )
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def source_url(self) -> str:
+        if self.platform == "openedu":
+            return (
+                "https://openedu.ru/course/"
+                f"{self.raw_data.get('org', '')}/"
+                f"{self.raw_data.get('number', '')}/"
+            )
+        return f"https://stepik.org/course/{self.external_id}"
+
     def time_to_complete_to_hours(self):
         if not self.time_to_complete:
             return "Не указано"
         return round(self.time_to_complete / 3600, 2)
 
 
-class Review(ExternalEntityModel):
+class Review(PayloadEntityModel):
     course = models.ForeignKey(
         Course,
         on_delete=models.CASCADE,
@@ -208,6 +297,12 @@ class Review(ExternalEntityModel):
     raw_data = models.JSONField(
         default=dict, blank=True, verbose_name="Данные с запроса"
     )
+    removed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Удалено на Stepik",
+    )
 
     class Meta:
         ordering = ["-create_date"]
@@ -216,3 +311,166 @@ class Review(ExternalEntityModel):
 
     def __str__(self):
         return f"Отзыв {self.external_id} на курс '{self.course.title}'"
+
+
+class FailedRequest(TimestampedModel):
+    endpoint = models.CharField(max_length=100, verbose_name="Эндпоинт")
+    url = models.TextField(verbose_name="Адрес запроса")
+    ids = models.JSONField(
+        default=list, blank=True, verbose_name="ID запрошенных объектов"
+    )
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    attempts = models.IntegerField(default=0, verbose_name="Попыток")
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Неудачный запрос"
+        verbose_name_plural = "Неудачные запросы"
+
+    def __str__(self):
+        return f"{self.endpoint}: {self.url}"
+
+
+class CrawlRun(TimestampedModel):
+    STATUS_CHOICES = [
+        ("queued", "В очереди"),
+        ("running", "Выполняется"),
+        ("finished", "Завершён"),
+        ("failed", "Ошибка"),
+        ("interrupted", "Прерван"),
+        ("cancelled", "Отменён"),
+    ]
+    PHASE_CHOICES = [
+        ("categories", "Категории"),
+        ("lists", "Подкатегории"),
+        ("courses", "Курсы"),
+        ("reconcile", "Сверка"),
+        ("finished", "Завершено"),
+    ]
+    KIND_CHOICES = [
+        ("full", "Полный обход"),
+        ("refresh", "Обновление курсов"),
+    ]
+
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        default="full",
+        verbose_name="Тип",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default="running",
+        verbose_name="Статус",
+    )
+    phase = models.CharField(
+        max_length=20,
+        choices=PHASE_CHOICES,
+        default="categories",
+        verbose_name="Этап",
+    )
+    finished_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Завершён"
+    )
+    courses_done = models.IntegerField(
+        default=0, verbose_name="Обработано курсов"
+    )
+    courses_total = models.IntegerField(
+        default=0, verbose_name="Всего курсов"
+    )
+    completed_list_ids = models.JSONField(
+        default=list, blank=True, verbose_name="Обработанные подкатегории"
+    )
+    report = models.JSONField(default=dict, blank=True, verbose_name="Отчёт")
+    lock = models.BooleanField(
+        null=True, unique=True, editable=False, verbose_name="Блокировка"
+    )
+    cancel_requested = models.BooleanField(
+        default=False, verbose_name="Запрошена отмена"
+    )
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Запуск парсера"
+        verbose_name_plural = "Запуски парсера"
+
+    def __str__(self):
+        return f"Запуск {self.pk} ({self.get_status_display()})"
+
+
+class CrawlCheckpoint(models.Model):
+    run = models.ForeignKey(
+        CrawlRun,
+        on_delete=models.CASCADE,
+        related_name="checkpoints",
+        verbose_name="Запуск",
+    )
+    course_external_id = models.IntegerField(verbose_name="ID курса на Stepik")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["run", "course_external_id"],
+                name="unique_crawl_checkpoint",
+            )
+        ]
+        verbose_name = "Обработанный курс"
+        verbose_name_plural = "Обработанные курсы"
+
+    def __str__(self):
+        return f"Курс {self.course_external_id} в запуске {self.run_id}"
+
+
+class CrawlTask(TimestampedModel):
+    STATUS_CHOICES = [
+        ("pending", "Ожидает"),
+        ("leased", "В работе"),
+        ("done", "Выполнена"),
+        ("failed", "Ошибка"),
+    ]
+
+    run = models.ForeignKey(
+        CrawlRun,
+        on_delete=models.CASCADE,
+        related_name="tasks",
+        verbose_name="Запуск",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default="pending",
+        verbose_name="Статус",
+    )
+    course_ids = models.JSONField(default=list, verbose_name="ID курсов")
+    course_lists = models.JSONField(
+        default=dict, blank=True, verbose_name="Подкатегории курсов"
+    )
+    force_ids = models.JSONField(
+        default=list, blank=True, verbose_name="Курсы без дельта-проверки"
+    )
+    worker = models.CharField(
+        max_length=255, blank=True, verbose_name="Обработчик"
+    )
+    lease_expires_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Аренда до"
+    )
+    attempts = models.IntegerField(default=0, verbose_name="Попыток")
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    incomplete_fetches = models.IntegerField(
+        default=0, verbose_name="Не получено объектов"
+    )
+
+    class Meta:
+        ordering = ["pk"]
+        indexes = [
+            models.Index(
+                fields=["run", "status", "lease_expires_at"],
+                name="crawl_task_claim_idx",
+            )
+        ]
+        verbose_name = "Задача обхода"
+        verbose_name_plural = "Задачи обхода"
+
+    def __str__(self):
+        return f"Задача {self.pk} ({len(self.course_ids)} курсов)"
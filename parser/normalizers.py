@@ -0,0 +1,144 @@
+from datetime import datetime
+import hashlib
+import json
+from typing import Dict, Optional
+
+from django.utils.text import slugify
+
+from parser.models import Category, Course, CourseList, Review, StepikUser
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except Exception as e:
+        print(e.__class__.__name__)
+        return None
+
+
+def payload_hash(data: Dict) -> str:
+    canonical = json.dumps(
+        data, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def course_content_hash(course_data: Dict) -> str:
+    return payload_hash(
+        {
+            "update_date": course_data.get("update_date"),
+            "reviews_count": course_data.get("reviews_count", 0),
+            "authors": sorted(course_data.get("authors") or []),
+            "instructors": sorted(course_data.get("instructors") or []),
+        }
+    )
+
+
+def openedu_content_hash(course_data: Dict) -> str:
+    return payload_hash(
+        {
+            key: value
+            for key, value in course_data.items()
+            if key != "enrollment_count"
+        }
+    )
+
+
+def normalize_category(category_data: Dict) -> Category:
+    return Category(
+        external_id=category_data["id"],
+        title=category_data.get("title", ""),
+    )
+
+
+def normalize_course_list(list_data: Dict) -> CourseList:
+    return CourseList(
+        external_id=list_data["id"],
+        title=list_data["title"],
+        description=list_data.get("description", ""),
+    )
+
+
+def normalize_user(user_data: Dict) -> StepikUser:
+    return StepikUser(
+        external_id=user_data["id"],
+        full_name=user_data.get("full_name", ""),
+        avatar=user_data.get("avatar", ""),
+        bio=user_data.get("bio", ""),
+        details=user_data,
+        payload_hash=payload_hash(user_data),
+    )
+
+
+def normalize_course(course_data: Dict) -> Course:
+    cover = course_data.get("cover", "")
+    if not cover or cover == "None":
+        cover = ""
+
+    return Course(
+        external_id=course_data["id"],
+        title=course_data.get("title", ""),
+        slug=course_data.get("slug", ""),
+        description=course_data.get("description", ""),
+        summary=course_data.get("summary", ""),
+        cover=cover,
+        is_paid=course_data.get("is_paid", False),
+        price=course_data.get("price"),
+        learners_count=course_data.get("learners_count", 0),
+        time_to_complete=course_data.get("time_to_complete"),
+        language=course_data.get("language", ""),
+        is_active=course_data.get("is_active", True),
+        is_public=course_data.get("is_public", True),
+        is_featured=course_data.get("is_featured", False),
+        reviews_count=course_data.get("reviews_count", 0),
+        raw_data=course_data,
+        platform="stepik",
+        payload_hash=payload_hash(course_data),
+        content_hash=course_content_hash(course_data),
+    )
+
+
+def normalize_review(review_data: Dict) -> Review:
+    return Review(
+        external_id=review_data["id"],
+        score=review_data.get("score", 0),
+        text=review_data.get("text", ""),
+        create_date=parse_datetime(review_data.get("create_date")),
+        update_date=parse_datetime(review_data.get("update_date")),
+        raw_data=review_data,
+        payload_hash=payload_hash(review_data),
+    )
+
+
+def openedu_course_id(course_key: str) -> int:
+    digest = hashlib.sha256(course_key.encode()).digest()
+    return int.from_bytes(digest[:4], "big") & 0x7FFFFFFF
+
+
+def normalize_openedu_course(course_data: Dict) -> Course:
+    image = (course_data.get("media") or {}).get("image") or {}
+    language = course_data.get("language") or ""
+    price = course_data.get("price")
+
+    return Course(
+        external_id=openedu_course_id(course_data["id"]),
+        title=course_data.get("name", ""),
+        slug=slugify(
+            f"{course_data.get('org', '')}-{course_data.get('number', '')}"
+        ),
+        description=course_data.get("overview") or "",
+        summary=course_data.get("short_description") or "",
+        cover=image.get("raw") or "",
+        is_paid=bool(price),
+        price=price or None,
+        learners_count=course_data.get("enrollment_count") or 0,
+        language=language if language in ("ru", "en") else "",
+        is_active=not course_data.get("hidden", False),
+        is_public=True,
+        raw_data=course_data,
+        platform="openedu",
+        payload_hash=payload_hash(course_data),
+        content_hash=openedu_content_hash(course_data),
+    )
@@ -0,0 +1,129 @@
+from typing import Dict, Iterable, List, Set
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from parser.models import Course, CourseList, CrawlRun, FailedRequest, Review
+
+
+class ReconcileRefused(Exception):
+    pass
+
+
+def missing_ids(queryset: QuerySet, seen_ids: Iterable[int]) -> List[int]:
+    present = set(
+        queryset.filter(removed_at__isnull=True).values_list(
+            "external_id", flat=True
+        )
+    )
+    return sorted(present - set(seen_ids))
+
+
+def tombstone(
+    queryset: QuerySet, external_ids: List[int], chunk_size: int = 500
+) -> int:
+    now = timezone.now()
+    removed = 0
+    for i in range(0, len(external_ids), chunk_size):
+        removed += queryset.filter(
+            external_id__in=external_ids[i: i + chunk_size],
+            removed_at__isnull=True,
+        ).update(removed_at=now)
+    return removed
+
+
+def check_removed_ratio(
+    missing: int, active: int, max_removed_ratio: float
+) -> None:
+    if missing > max_removed_ratio * active:
+        raise ReconcileRefused(
+            f"пропало {missing} из {active} курсов, "
+            f"это больше допустимой доли {max_removed_ratio:.0%}"
+        )
+
+
+def remove_missing_reviews(
+    reviews_by_course: Dict[int, Set[int]],
+    chunk_size: int = 500,
+    using: str = "default",
+) -> int:
+    reviews = Review.objects.using(using)
+    stale = [
+        review_id
+        for course_id, review_id in reviews.filter(
+            course__platform="stepik",
+            course__external_id__in=reviews_by_course,
+            removed_at__isnull=True,
+        ).values_list("course__external_id", "external_id")
+        if review_id not in reviews_by_course[course_id]
+    ]
+    return tombstone(reviews, stale, chunk_size)
+
+
+def reconcile(
+    run: CrawlRun,
+    course_ids: Iterable[int],
+    list_ids: Iterable[int],
+    failed_requests: int = 0,
+    incomplete_fetches: int = 0,
+    max_removed_ratio: float = 0.1,
+    chunk_size: int = 500,
+    using: str = "default",
+) -> Dict[str, int]:
+    if run.kind != "full":
+        raise ReconcileRefused("сверка возможна только после полного обхода")
+    failed_requests += FailedRequest.objects.filter(
+        created_at__gte=run.created_at
+    ).count()
+    if failed_requests:
+        raise ReconcileRefused(
+            f"обход неполный, неудачных запросов: {failed_requests}"
+        )
+    if incomplete_fetches:
+        raise ReconcileRefused(
+            f"обход неполный, не получено объектов: {incomplete_fetches}"
+        )
+
+    courses = Course.objects.using(using).filter(platform="stepik")
+    course_lists = CourseList.objects.using(using)
+    missing_courses = missing_ids(courses, course_ids)
+    missing_lists = missing_ids(course_lists, list_ids)
+    check_removed_ratio(
+        len(missing_courses),
+        courses.filter(removed_at__isnull=True).count(),
+        max_removed_ratio,
+    )
+
+    with transaction.atomic(using=using):
+        removed = {
+            "courses": tombstone(courses, missing_courses, chunk_size),
+            "course_lists": tombstone(
+                course_lists, missing_lists, chunk_size
+            ),
+            "reviews": 0,
+        }
+        for i in range(0, len(missing_courses), chunk_size):
+            removed["reviews"] += Review.objects.using(using).filter(
+                course__platform="stepik",
+                course__external_id__in=missing_courses[i: i + chunk_size],
+                removed_at__isnull=True,
+            ).update(removed_at=timezone.now())
+    return removed
+
+
+def reconcile_source(
+    platform: str,
+    course_ids: Iterable[int],
+    max_removed_ratio: float = 0.1,
+    chunk_size: int = 500,
+    using: str = "default",
+) -> int:
+    courses = Course.objects.using(using).filter(platform=platform)
+    missing_courses = missing_ids(courses, course_ids)
+    check_removed_ratio(
+        len(missing_courses),
+        courses.filter(removed_at__isnull=True).count(),
+        max_removed_ratio,
+    )
+    return tombstone(courses, missing_courses, chunk_size)
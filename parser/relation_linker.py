@@ -0,0 +1,141 @@
+import time
+from typing import Dict, Iterable
+
+from django.db import transaction
+
+from parser.models import Course, CourseList, StepikUser
+
+M2M_TARGETS = {
+    "course_lists": CourseList,
+    "authors": StepikUser,
+    "instructors": StepikUser,
+}
+
+
+class RelationLinker:
+    def __init__(self, using: str = "default"):
+        self.using = using
+        self.edges = {name: {} for name in M2M_TARGETS}
+        self.timings = {}
+
+    def __len__(self) -> int:
+        return len(
+            set().union(*(edges.keys() for edges in self.edges.values()))
+        )
+
+    def add(
+        self,
+        course_id: int,
+        course_lists: Iterable[int] = (),
+        authors: Iterable[int] = (),
+        instructors: Iterable[int] = (),
+    ) -> None:
+        for name, target_ids in (
+            ("course_lists", course_lists),
+            ("authors", authors),
+            ("instructors", instructors),
+        ):
+            target_ids = set(target_ids)
+            if target_ids:
+                self.edges[name].setdefault(course_id, set()).update(
+                    target_ids
+                )
+
+    def clear(self) -> None:
+        for edges in self.edges.values():
+            edges.clear()
+
+    def flush(self) -> Dict[str, Dict[str, int]]:
+        stats = {}
+        with transaction.atomic(using=self.using):
+            course_ids = set().union(
+                *(edges.keys() for edges in self.edges.values())
+            )
+            course_pks = self._pk_map(Course, course_ids)
+
+            target_ids = {model: set() for model in M2M_TARGETS.values()}
+            for name, model in M2M_TARGETS.items():
+                for ids in self.edges[name].values():
+                    target_ids[model].update(ids)
+            target_pks = {
+                model: self._pk_map(model, ids)
+                for model, ids in target_ids.items()
+            }
+
+            for name, model in M2M_TARGETS.items():
+                if self.edges[name]:
+                    started = time.monotonic()
+                    stats[name] = self._sync_through(
+                        name, course_pks, target_pks[model]
+                    )
+                    self.timings[name] = (
+                        self.timings.get(name, 0.0)
+                        + time.monotonic()
+                        - started
+                    )
+
+        self.clear()
+        self.report(stats)
+        return stats
+
+    def _pk_map(self, model, external_ids: set) -> Dict[int, int]:
+        if not external_ids:
+            return {}
+        queryset = model.objects.using(self.using)
+        if model is Course:
+            queryset = queryset.filter(platform="stepik")
+        return dict(
+            queryset.filter(external_id__in=external_ids).values_list(
+                "external_id", "pk"
+            )
+        )
+
+    def _sync_through(
+        self,
+        name: str,
+        course_pks: Dict[int, int],
+        target_pks: Dict[int, int],
+    ) -> Dict[str, int]:
+        field = Course._meta.get_field(name)
+        through = field.remote_field.through
+        source_column = field.m2m_column_name()
+        target_column = field.m2m_reverse_name()
+
+        desired = {
+            (course_pks[course_id], target_pks[target_id])
+            for course_id, target_ids in self.edges[name].items()
+            if course_id in course_pks
+            for target_id in target_ids
+            if target_id in target_pks
+        }
+        linked_course_pks = {course_pk for course_pk, _ in desired}
+
+        existing = {}
+        through_objects = through.objects.using(self.using)
+        for pk, course_pk, target_pk in through_objects.filter(
+            **{f"{source_column}__in": linked_course_pks}
+        ).values_list("pk", source_column, target_column):
+            existing[(course_pk, target_pk)] = pk
+
+        stale = [pk for edge, pk in existing.items() if edge not in desired]
+        missing = desired - existing.keys()
+
+        if stale:
+            through_objects.filter(pk__in=stale).delete()
+        through_objects.bulk_create(
+            [
+                through(**{source_column: course_pk, target_column: target_pk})
+                for course_pk, target_pk in missing
+            ],
+            ignore_conflicts=True,
+        )
+
+        return {"linked": len(missing), "unlinked": len(stale)}
+
+    @staticmethod
+    def report(stats: Dict[str, Dict[str, int]]) -> None:
+        for name, counts in stats.items():
+            print(
+                f"Связи {name}: добавлено {counts['linked']}, "
+                f"удалено {counts['unlinked']}"
+            )
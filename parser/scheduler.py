@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+import random
+from typing import Dict, Iterable, List
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from parser.models import Course, CrawlRun, Review
+
+TIER_INTERVALS = {
+    "hot": timedelta(hours=6),
+    "warm": timedelta(days=3),
+    "cold": timedelta(days=14),
+}
+
+
+class RefreshPolicy:
+    def __init__(
+        self,
+        intervals: Dict[str, timedelta] = None,
+        discovery_interval: timedelta = timedelta(days=7),
+        jitter: float = 0.1,
+        hot_percentile: float = 0.9,
+        warm_percentile: float = 0.5,
+        recent_reviews: timedelta = timedelta(days=14),
+        hot_change: timedelta = timedelta(days=3),
+        warm_change: timedelta = timedelta(days=30),
+        chunk_size: int = 500,
+    ):
+        self.intervals = {**TIER_INTERVALS, **(intervals or {})}
+        self.discovery_interval = discovery_interval
+        self.jitter = jitter
+        self.hot_percentile = hot_percentile
+        self.warm_percentile = warm_percentile
+        self.recent_reviews = recent_reviews
+        self.hot_change = hot_change
+        self.warm_change = warm_change
+        self.chunk_size = chunk_size
+
+    def discovery_due(self) -> bool:
+        last = (
+            CrawlRun.objects.filter(kind="full", status="finished")
+            .order_by("-finished_at")
+            .first()
+        )
+        return (
+            last is None
+            or last.finished_at <= timezone.now() - self.discovery_interval
+        )
+
+    def due_course_ids(self, limit: int) -> List[int]:
+        return list(
+            Course.objects.filter(platform="stepik", removed_at__isnull=True)
+            .filter(
+                Q(next_refresh_at__lte=timezone.now())
+                | Q(next_refresh_at__isnull=True)
+            )
+            .order_by(F("next_refresh_at").asc(nulls_first=True))
+            .values_list("external_id", flat=True)[:limit]
+        )
+
+    def next_refresh(self, tier: str, now: datetime) -> datetime:
+        return now + self.intervals[tier] * random.uniform(
+            1 - self.jitter, 1 + self.jitter
+        )
+
+    @staticmethod
+    def changed_since(course: Course, since: datetime) -> bool:
+        return (
+            course.content_changed_at is not None
+            and course.content_changed_at >= since
+        )
+
+    def classify(
+        self,
+        course: Course,
+        now: datetime,
+        hot_learners: int,
+        warm_learners: int,
+        reviewed: set,
+    ) -> str:
+        if (
+            course.learners_count >= hot_learners
+            or course.pk in reviewed
+            or self.changed_since(course, now - self.hot_change)
+        ):
+            return "hot"
+        if (
+            course.learners_count >= warm_learners
+            or self.changed_since(course, now - self.warm_change)
+        ):
+            return "warm"
+        return "cold"
+
+    def assign(self, course_ids: Iterable[int] = None) -> Dict[str, int]:
+        now = timezone.now()
+        courses = Course.objects.filter(
+            platform="stepik", removed_at__isnull=True
+        )
+        learners = sorted(courses.values_list("learners_count", flat=True))
+        if not learners:
+            return {}
+        hot_learners = max(
+            1, learners[int(self.hot_percentile * (len(learners) - 1))]
+        )
+        warm_learners = max(
+            1, learners[int(self.warm_percentile * (len(learners) - 1))]
+        )
+        reviewed = set(
+            Review.objects.filter(
+                create_date__gte=now - self.recent_reviews
+            ).values_list("course_id", flat=True)
+        )
+
+        if course_ids is None:
+            course_ids = courses.values_list("external_id", flat=True)
+        course_ids = list(course_ids)
+
+        counts = {tier: 0 for tier in self.intervals}
+        for i in range(0, len(course_ids), self.chunk_size):
+            chunk = list(
+                courses.filter(
+                    external_id__in=course_ids[i: i + self.chunk_size]
+                ).only("pk", "learners_count", "content_changed_at")
+            )
+            for course in chunk:
+                tier = self.classify(
+                    course, now, hot_learners, warm_learners, reviewed
+                )
+                course.refresh_tier = tier
+                course.next_refresh_at = self.next_refresh(tier, now)
+                counts[tier] += 1
+            Course.objects.bulk_update(
+                chunk, ["refresh_tier", "next_refresh_at"]
+            )
+        return counts
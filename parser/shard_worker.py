@@ -0,0 +1,136 @@
+import asyncio
+from datetime import timedelta
+
+from parser.bulk_writer import DBWriter
+from parser.checkpoints import Checkpointer
+from parser.models import CrawlTask
+from parser.sharding import (
+    active_workers,
+    claim_task,
+    complete_task,
+    LEASE,
+    load_run,
+    release_task,
+    renew_lease,
+    task_counts,
+    worker_name,
+)
+from parser.stepik_parser import StepikParser
+from parser.user_resolver import UserResolver
+
+
+class ShardWorker:
+    def __init__(
+        self,
+        parser: StepikParser,
+        run_id: int = None,
+        lease: timedelta = LEASE,
+        poll_interval: float = 5.0,
+    ):
+        self.parser = parser
+        self.run_id = run_id
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.name = worker_name()
+        self.rate_limit = parser.rate_limit
+        self.tasks_done = 0
+
+    async def run(self) -> int:
+        parser = self.parser
+        async with parser.make_client() as client:
+            parser.client = client
+            parser.user_resolver = UserResolver(
+                parser.get_users, parser.user_ttl, using=parser.using
+            )
+            writer = DBWriter(
+                parser.write_batch_size,
+                parser.chunk_size,
+                parser.using,
+                parser.text_workers,
+            )
+            parser.writer = writer
+            try:
+                run = await writer.submit(load_run, self.run_id)
+                writer.checkpointer = Checkpointer(run)
+                print(f"Обработчик {self.name}, запуск {run.pk}")
+                await parser.user_resolver.load_fresh()
+
+                while True:
+                    task = await writer.submit(
+                        claim_task, run.pk, self.name, self.lease
+                    )
+                    if task is not None:
+                        if not await self.process(writer, task):
+                            break
+                        continue
+
+                    counts = await writer.submit(task_counts, run)
+                    if not counts["pending"] and not counts["leased"]:
+                        break
+                    if await writer.submit(
+                        writer.checkpointer.check_cancelled
+                    ):
+                        break
+                    await asyncio.sleep(self.poll_interval)
+            finally:
+                writer.defer(parser.save_failed_requests, [], False)
+                writer.close()
+
+            print(
+                f"Обработчик {self.name}: задач {self.tasks_done}, "
+                f"курсов {writer.written}"
+            )
+            print(f"Запросы: {client.summary()}")
+            print(client.limiter.summary())
+        return self.tasks_done
+
+    async def process(self, writer: DBWriter, task: CrawlTask) -> bool:
+        print(
+            f"Задача {task.pk}: курсов {len(task.course_ids)}, "
+            f"попытка {task.attempts}"
+        )
+        heartbeat = asyncio.create_task(self.heartbeat(writer, task))
+        incomplete = self.incomplete_fetches()
+        try:
+            cancelled = await self.parser.crawl(
+                writer,
+                task.course_ids,
+                {
+                    int(course_id): set(list_ids)
+                    for course_id, list_ids in task.course_lists.items()
+                },
+                set(task.force_ids),
+            )
+        except Exception as e:
+            print(f"Задача {task.pk} не выполнена: {e}")
+            await writer.submit(release_task, task, str(e))
+            return True
+        finally:
+            heartbeat.cancel()
+
+        if cancelled:
+            await writer.submit(release_task, task, "Запуск отменён")
+            return False
+        await writer.submit(
+            complete_task,
+            task,
+            self.incomplete_fetches() - incomplete,
+        )
+        self.tasks_done += 1
+        return True
+
+    def incomplete_fetches(self) -> int:
+        return self.parser.incomplete_fetches + self.parser.replay_misses()
+
+    async def heartbeat(self, writer: DBWriter, task: CrawlTask) -> None:
+        while True:
+            if self.rate_limit:
+                workers = await writer.submit(active_workers, task.run_id)
+                self.parser.client.rate_limiter.rate = self.rate_limit / max(
+                    workers, 1
+                )
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+            if not await writer.submit(
+                renew_lease, task, self.name, self.lease
+            ):
+                print(f"Аренда задачи {task.pk} перехвачена")
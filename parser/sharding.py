@@ -0,0 +1,161 @@
+import asyncio
+from datetime import timedelta
+import os
+import socket
+import sys
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from parser.models import CrawlRun, CrawlTask
+
+LEASE = timedelta(minutes=2)
+MAX_ATTEMPTS = 3
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_tasks(
+    run: CrawlRun,
+    course_ids: Iterable[int],
+    list_ids_by_course: Dict[int, Set[int]],
+    force_ids: Set[int],
+    task_size: int,
+) -> int:
+    course_ids = sorted(course_ids)
+    chunks = [
+        course_ids[i: i + task_size]
+        for i in range(0, len(course_ids), task_size)
+    ]
+    with transaction.atomic():
+        run.tasks.exclude(status="done").delete()
+        CrawlTask.objects.bulk_create(
+            [
+                CrawlTask(
+                    run=run,
+                    course_ids=chunk,
+                    course_lists={
+                        str(course_id): sorted(list_ids_by_course[course_id])
+                        for course_id in chunk
+                        if course_id in list_ids_by_course
+                    },
+                    force_ids=sorted(force_ids.intersection(chunk)),
+                )
+                for chunk in chunks
+            ],
+            batch_size=500,
+        )
+    return run.tasks.count()
+
+
+def load_run(run_id: Optional[int]) -> CrawlRun:
+    if run_id is not None:
+        return CrawlRun.objects.get(pk=run_id)
+    return CrawlRun.objects.get(lock=True)
+
+
+def claim_task(
+    run_id: int, worker: str, lease: timedelta = LEASE
+) -> Optional[CrawlTask]:
+    now = timezone.now()
+    available = CrawlTask.objects.filter(run_id=run_id).filter(
+        Q(status="pending") | Q(status="leased", lease_expires_at__lt=now)
+    )
+    available.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status="failed", lease_expires_at=None, error="Исчерпаны попытки"
+    )
+
+    for task in available.order_by("pk")[:10]:
+        claimed = available.filter(pk=task.pk).update(
+            status="leased",
+            worker=worker,
+            lease_expires_at=now + lease,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            task.refresh_from_db()
+            return task
+    return None
+
+
+def renew_lease(
+    task: CrawlTask, worker: str, lease: timedelta = LEASE
+) -> bool:
+    return bool(
+        CrawlTask.objects.filter(
+            pk=task.pk, worker=worker, status="leased"
+        ).update(lease_expires_at=timezone.now() + lease)
+    )
+
+
+def complete_task(task: CrawlTask, incomplete_fetches: int = 0) -> None:
+    CrawlTask.objects.filter(pk=task.pk).update(
+        status="done",
+        lease_expires_at=None,
+        error="",
+        incomplete_fetches=incomplete_fetches,
+    )
+
+
+def release_task(task: CrawlTask, error: str) -> None:
+    CrawlTask.objects.filter(pk=task.pk).exclude(status="done").update(
+        status="failed" if task.attempts >= MAX_ATTEMPTS else "pending",
+        worker="",
+        lease_expires_at=None,
+        error=error,
+    )
+
+
+def task_counts(run: CrawlRun) -> Dict[str, int]:
+    counts = {status: 0 for status, _ in CrawlTask.STATUS_CHOICES}
+    counts.update(
+        run.tasks.order_by()
+        .values_list("status")
+        .annotate(count=Count("pk"))
+    )
+    return counts
+
+
+def incomplete_fetches(run: CrawlRun) -> int:
+    return (
+        run.tasks.filter(status="done").aggregate(
+            total=Sum("incomplete_fetches")
+        )["total"]
+        or 0
+    )
+
+
+def active_workers(run_id: int) -> int:
+    return (
+        CrawlTask.objects.filter(
+            run_id=run_id,
+            status="leased",
+            lease_expires_at__gt=timezone.now(),
+        )
+        .values("worker")
+        .distinct()
+        .count()
+    )
+
+
+async def spawn_worker(
+    run_id: int, options: List[str]
+) -> asyncio.subprocess.Process:
+    python_path = [str(settings.BASE_DIR)]
+    if os.environ.get("PYTHONPATH"):
+        python_path.append(os.environ["PYTHONPATH"])
+    return await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "django",
+        "crawl_worker",
+        "--run-id",
+        str(run_id),
+        *options,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(python_path)},
+    )
@@ -0,0 +1,103 @@
+from abc import ABC, abstractmethod
+import asyncio
+import json
+import math
+from pathlib import Path
+from typing import AsyncIterator, Dict, List
+from urllib.parse import urlencode
+
+from parser.client import RequestFailed, StepikClient
+from parser.models import Course
+from parser.normalizers import normalize_openedu_course
+
+OPENEDU_API_URL = "https://courses.openedu.ru/api/courses/v1/courses/"
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+OPENEDU_FIXTURES = FIXTURES_DIR / "openedu_courses.json"
+
+
+class SourceAdapter(ABC):
+    platform = ""
+
+    def __init__(self):
+        self.client = None
+        self.failed = 0
+
+    def bind(self, client: StepikClient) -> None:
+        self.client = client
+
+    @abstractmethod
+    def discover(self) -> AsyncIterator[List[Dict]]:
+        pass
+
+    async def fetch_courses(self, stubs: List[Dict]) -> List[Dict]:
+        return stubs
+
+    @abstractmethod
+    def normalize_course(self, course_data: Dict) -> Course:
+        pass
+
+
+class OpenEduAdapter(SourceAdapter):
+    platform = "openedu"
+
+    def __init__(self, api_url: str = OPENEDU_API_URL, page_size: int = 100):
+        super().__init__()
+        self.api_url = api_url
+        self.page_size = page_size
+
+    async def fetch_page(self, page: int) -> Dict:
+        params = urlencode({"page": page, "page_size": self.page_size})
+        return await self.client.get_json(
+            f"{self.api_url}?{params}", f"{self.platform}-courses"
+        )
+
+    async def discover(self) -> AsyncIterator[List[Dict]]:
+        try:
+            first = await self.fetch_page(1)
+        except RequestFailed as e:
+            print(f"OpenEdu: ошибка загрузки каталога: {e}")
+            self.failed += 1
+            return
+        yield first.get("results", [])
+
+        pages = first.get("pagination", {}).get("num_pages", 1)
+        for task in asyncio.as_completed(
+            [self.fetch_page(page) for page in range(2, pages + 1)]
+        ):
+            try:
+                data = await task
+            except RequestFailed as e:
+                print(f"OpenEdu: ошибка загрузки страницы каталога: {e}")
+                self.failed += 1
+                continue
+            yield data.get("results", [])
+
+    def normalize_course(self, course_data: Dict) -> Course:
+        return normalize_openedu_course(course_data)
+
+
+class FakeOpenEduAdapter(OpenEduAdapter):
+    def __init__(self, fixtures: Path = OPENEDU_FIXTURES, page_size: int = 10):
+        super().__init__(f"fixture://{fixtures}", page_size)
+        self.fixtures = Path(fixtures)
+        self.courses = None
+
+    async def fetch_page(self, page: int) -> Dict:
+        if self.courses is None:
+            self.courses = json.loads(
+                await asyncio.to_thread(
+                    self.fixtures.read_text, encoding="utf-8"
+                )
+            )
+        pages = max(1, math.ceil(len(self.courses) / self.page_size))
+        start = (page - 1) * self.page_size
+        return {
+            "results": self.courses[start: start + self.page_size],
+            "pagination": {
+                "count": len(self.courses),
+                "num_pages": pages,
+                "next": f"{self.api_url}?page={page + 1}"
+                if page < pages
+                else None,
+            },
+        }
@@ -0,0 +1,121 @@
+from contextlib import closing
+import os
+import sqlite3
+from typing import Dict, List, Tuple
+
+from django.db import connections, transaction
+
+from parser.models import Category, Course, CourseList, Review, StepikUser
+
+
+class StagingInvalid(Exception):
+    pass
+
+
+def catalog_tables() -> List[Tuple[str, List[str]]]:
+    tables = []
+    for model in (Category, CourseList, StepikUser, Course):
+        tables.append(
+            (
+                model._meta.db_table,
+                [field.column for field in model._meta.concrete_fields],
+            )
+        )
+    for field in Course._meta.local_many_to_many:
+        through = field.remote_field.through
+        tables.append(
+            (
+                through._meta.db_table,
+                [field.column for field in through._meta.concrete_fields],
+            )
+        )
+    tables.append(
+        (
+            Review._meta.db_table,
+            [field.column for field in Review._meta.concrete_fields],
+        )
+    )
+    return tables
+
+
+class StagingDatabase:
+    def __init__(
+        self,
+        alias: str = "staging",
+        live_alias: str = "default",
+        max_drop: float = 0.1,
+    ):
+        self.alias = alias
+        self.live_alias = live_alias
+        self.max_drop = max_drop
+
+    @property
+    def path(self) -> str:
+        return str(connections[self.alias].settings_dict["NAME"])
+
+    @property
+    def live_path(self) -> str:
+        return str(connections[self.live_alias].settings_dict["NAME"])
+
+    def remove(self) -> None:
+        connections[self.alias].close()
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def prepare(self, reuse: bool = False) -> bool:
+        if reuse and os.path.exists(self.path):
+            return False
+        self.remove()
+        with closing(sqlite3.connect(self.live_path)) as live, closing(
+            sqlite3.connect(self.path)
+        ) as staging:
+            live.backup(staging)
+        return True
+
+    def validate(self) -> Dict[str, int]:
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute("PRAGMA integrity_check")
+            result = cursor.fetchone()[0]
+            if result != "ok":
+                raise StagingInvalid(f"повреждена база: {result}")
+            cursor.execute("PRAGMA foreign_key_check")
+            if cursor.fetchone() is not None:
+                raise StagingInvalid("нарушены внешние ключи")
+
+        counts = {
+            model.__name__: model.objects.using(self.alias).count()
+            for model in (Category, CourseList, StepikUser, Course, Review)
+        }
+        staged = Course.objects.using(self.alias).active().count()
+        live = Course.objects.using(self.live_alias).active().count()
+        if not staged:
+            raise StagingInvalid("в каталоге нет ни одного курса")
+        if staged < live * (1 - self.max_drop):
+            raise StagingInvalid(
+                f"активных курсов стало {staged} вместо {live}"
+            )
+        return counts
+
+    def swap(self) -> None:
+        connections[self.alias].close()
+        tables = catalog_tables()
+        connection = connections[self.live_alias]
+        with connection.cursor() as cursor:
+            cursor.execute("ATTACH DATABASE %s AS staging", [self.path])
+        try:
+            with transaction.atomic(using=self.live_alias):
+                with connection.cursor() as cursor:
+                    cursor.execute("PRAGMA defer_foreign_keys = ON")
+                    for table, _ in reversed(tables):
+                        cursor.execute(f'DELETE FROM "{table}"')
+                    for table, columns in tables:
+                        column_list = ", ".join(f'"{c}"' for c in columns)
+                        cursor.execute(
+                            f'INSERT INTO "{table}" ({column_list}) '
+                            f'SELECT {column_list} FROM staging."{table}"'
+                        )
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("DETACH DATABASE staging")
+        self.remove()
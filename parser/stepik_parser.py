@@ -1,41 +1,139 @@
-import aiohttp
 import asyncio
-from fake_useragent import UserAgent
-from typing import List, Dict
+from datetime import timedelta
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Set
+from urllib.parse import urlencode
 from asgiref.sync import sync_to_async
-from datetime import datetime
-
-from parser.models import Category, CourseList, StepikUser, Course, Review
+from django.db import transaction
+
+from parser.bulk_writer import DBWriter, link_review_users
+from parser.checkpoints import CrawlCancelled
+from parser.client import RequestFailed, StepikClient
+from parser.http_cache import ResponseCache
+from parser.metrics import CrawlMetrics
+from parser.models import Course, FailedRequest, Review
+from parser.reconcile import reconcile, reconcile_source, ReconcileRefused
+from parser.sharding import (
+    enqueue_tasks,
+    incomplete_fetches,
+    spawn_worker,
+    task_counts,
+)
+from parser.sources import SourceAdapter
+from parser.user_resolver import UserResolver
 
 CATEGORIES_NUMS_URL = (
     "https://cdn.stepik.net/media/files/rubricator_prod_20251224.json"
 )
-COURSE_LISTS_API = "https://stepik.org/api/course-lists"
-COURSES_API = "https://stepik.org/api/courses"
-REVIEWS_API = "https://stepik.org/api/course-reviews"
-USERS_API = "https://stepik.org/api/users"
+STEPIK_API_URL = "https://stepik.org/api"
+
+IDS_PER_REQUEST = 100
+RECONCILED_ENDPOINTS = {"course-lists", "courses", "course-reviews"}
+MAX_URL_LENGTH = 2000
 
 
 class StepikParser:
-    def __init__(self, max_concurrent: int = 10):
+    def __init__(
+        self,
+        max_concurrent: int = 10,
+        max_concurrent_limit: int = 64,
+        chunk_size: int = 500,
+        course_concurrency: int = None,
+        write_batch_size: int = 100,
+        queue_size: int = 200,
+        incremental_reviews: bool = False,
+        review_pages_window: int = 5,
+        user_ttl: timedelta = timedelta(hours=24),
+        ids_per_request: int = IDS_PER_REQUEST,
+        max_url_length: int = MAX_URL_LENGTH,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        cache: ResponseCache = None,
+        replay: bool = False,
+        delta: bool = True,
+        resume: bool = False,
+        run_id: int = None,
+        api_url: str = STEPIK_API_URL,
+        rubricator_url: str = CATEGORIES_NUMS_URL,
+        workers: int = None,
+        task_size: int = 200,
+        poll_interval: float = 5.0,
+        worker_options: List[str] = (),
+        rate_limit: float = None,
+        reconcile: bool = True,
+        max_removed_ratio: float = 0.1,
+        using: str = "default",
+        sources: List[SourceAdapter] = (),
+        text_workers: int = 2,
+        keep_lock: bool = False,
+    ):
         self.max_concurrent = max_concurrent
-        self.session = None
-        self.semaphore = None
-
-    def _generate_headers(self) -> Dict[str, str]:
-        ua = UserAgent()
-        return {"User-Agent": ua.random}
-
-    async def _fetch_json(self, url: str) -> Dict:
-        async with self.semaphore:
-            headers = self._generate_headers()
-            async with self.session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                return await response.json()
+        self.max_concurrent_limit = max(max_concurrent, max_concurrent_limit)
+        self.chunk_size = chunk_size
+        self.course_concurrency = course_concurrency or max_concurrent
+        self.write_batch_size = write_batch_size
+        self.queue_size = queue_size
+        self.incremental_reviews = incremental_reviews
+        self.review_pages_window = review_pages_window
+        self.user_ttl = user_ttl
+        self.user_resolver = None
+        self.ids_per_request = ids_per_request
+        self.max_url_length = max_url_length
+        self.missing_ids = {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failed_requests = []
+        self.incomplete_fetches = 0
+        self.cache = cache
+        self.replay = replay
+        self.delta = delta
+        self.resume = resume
+        self.run_id = run_id
+        self.rubricator_url = rubricator_url
+        self.workers = workers
+        self.task_size = task_size
+        self.poll_interval = poll_interval
+        self.worker_options = list(worker_options)
+        self.rate_limit = rate_limit
+        self.reconcile = reconcile
+        self.max_removed_ratio = max_removed_ratio
+        self.using = using
+        self.sources = list(sources)
+        self.text_workers = text_workers
+        self.keep_lock = keep_lock
+        self.source_courses = {}
+        self.removed = {}
+        self.incomplete_reviews = set()
+        self.course_lists_api = f"{api_url}/course-lists"
+        self.courses_api = f"{api_url}/courses"
+        self.reviews_api = f"{api_url}/course-reviews"
+        self.users_api = f"{api_url}/users"
+        self.writer = None
+        self.metrics = CrawlMetrics()
+        self.unchanged_courses = 0
+        self.client = None
+
+    def record_failure(
+        self, endpoint: str, ids: List[int], error: Exception
+    ) -> None:
+        print(f"Ошибка запроса {endpoint} ({len(ids)} id): {error}")
+        self.incomplete_fetches += len(ids)
+        if isinstance(error, RequestFailed) and error.retryable:
+            self.failed_requests.append(
+                {
+                    "endpoint": endpoint,
+                    "url": error.url,
+                    "ids": list(ids),
+                    "error": str(error.error),
+                    "attempts": error.attempts,
+                }
+            )
 
     async def get_categories(self) -> tuple[List[int], List[Dict]]:
-        async with self.session.get(CATEGORIES_NUMS_URL) as response:
-            categories_all = await response.json()
+        categories_all = await self.client.get_json(
+            self.rubricator_url, "rubricator"
+        )
 
         for subject in categories_all["subjects"]:
             if subject["title"] == "Информационные технологии":
@@ -54,343 +152,795 @@ class StepikParser:
 
         return [], []
 
-    async def get_course_lists(self, course_list_ids: List[int]) -> Dict:
-        params = "&".join([f"ids[]={cid}" for cid in course_list_ids])
-        url = f"{COURSE_LISTS_API}?{params}"
+    def chunk_ids(self, endpoint: str, ids: List[int]) -> List[List[int]]:
+        chunks = []
+        chunk = []
+        length = len(endpoint) + 1
+
+        for item_id in ids:
+            param = urlencode({"ids[]": item_id})
+            extra = len(param) + (1 if chunk else 0)
+            if chunk and (
+                len(chunk) >= self.ids_per_request
+                or length + extra > self.max_url_length
+            ):
+                chunks.append(chunk)
+                chunk = []
+                length = len(endpoint) + 1
+                extra = len(param)
+            chunk.append(item_id)
+            length += extra
+
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    async def fetch_chunk(self, endpoint: str, ids: List[int]) -> List[Dict]:
+        key = endpoint.rstrip("/").rsplit("/", 1)[-1]
+        item_urls = {
+            item_id: f"{endpoint}?{urlencode({'ids[]': item_id})}"
+            for item_id in ids
+        }
+        cached = await self.client.get_cached(list(item_urls.values()))
+        items = [cached[url] for url in item_urls.values() if url in cached]
+        remaining = [
+            item_id for item_id, url in item_urls.items() if url not in cached
+        ]
+
+        failed = set()
+        if remaining:
+            params = urlencode([("ids[]", item_id) for item_id in remaining])
+            url = f"{endpoint}?{params}"
+            try:
+                data = await self.client.get_json(url, use_cache=False)
+                fetched = data.get(key, [])
+                await self.client.store_cached(
+                    {
+                        item_urls[item["id"]]: item
+                        for item in fetched
+                        if item.get("id") in item_urls
+                    }
+                )
+                items.extend(fetched)
+            except RequestFailed as e:
+                self.record_failure(key, remaining, e)
+                failed.update(remaining)
+
+        missing = set(ids) - {item.get("id") for item in items}
+        if missing:
+            self.missing_ids.setdefault(key, set()).update(missing)
+            if key in RECONCILED_ENDPOINTS:
+                self.incomplete_fetches += len(missing - failed)
+        return items
+
+    async def iter_by_ids(
+        self, endpoint: str, ids: List[int]
+    ) -> AsyncIterator[List[Dict]]:
+        chunks = iter(self.chunk_ids(endpoint, ids))
+        pending = set()
 
         try:
-            data = await self._fetch_json(url)
-            course_lists = data.get("course-lists", [])
-
-            result = {}
-            for cl in course_lists:
-                title = cl.get("title", "Unknown")
-                result[title] = {
-                    "id": cl.get("id"),
-                    "title": title,
-                    "description": cl.get("description", ""),
-                    "course_count": len(cl.get("courses", [])),
-                    "course_ids": cl.get("courses", []),
-                }
+            while True:
+                for chunk in chunks:
+                    pending.add(
+                        asyncio.create_task(self.fetch_chunk(endpoint, chunk))
+                    )
+                    if len(pending) >= self.client.limiter.limit:
+                        break
+                if not pending:
+                    break
 
-            return result
-        except Exception as e:
-            print(f"Ошибка: {e}")
-            return {}
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def fetch_by_ids(
+        self, endpoint: str, ids: List[int]
+    ) -> Dict[int, Dict]:
+        result = {}
+        async for items in self.iter_by_ids(endpoint, ids):
+            for item in items:
+                result[item["id"]] = item
+
+        missing = set(ids) - result.keys()
+        if missing:
+            print(f"{endpoint}: не получено {len(missing)} из {len(ids)} id")
+        return result
+
+    async def get_course_lists(self, course_list_ids: List[int]) -> Dict:
+        course_lists = await self.fetch_by_ids(
+            self.course_lists_api, course_list_ids
+        )
+
+        result = {}
+        for list_id, cl in course_lists.items():
+            result[list_id] = {
+                "id": list_id,
+                "title": cl.get("title", "Unknown"),
+                "description": cl.get("description", ""),
+                "course_count": len(cl.get("courses", [])),
+                "course_ids": cl.get("courses", []),
+            }
+
+        return result
 
     async def get_course_details(
-        self, course_ids: List[int], batch_size: int = 100
+        self, course_ids: List[int]
+    ) -> AsyncIterator[List[Dict]]:
+        loaded = 0
+        async for courses in self.iter_by_ids(
+            self.courses_api, course_ids
+        ):
+            loaded += len(courses)
+            print(f"Загружено {loaded}/{len(course_ids)} курсов")
+            yield courses
+
+        missing = len(course_ids) - loaded
+        if missing:
+            print(f"Не получено деталей для {missing} курсов")
+
+    async def fetch_reviews_page(self, course_id: int, page: int) -> Dict:
+        url = f"{self.reviews_api}?course={course_id}&page={page}"
+        return await self.client.get_json(url)
+
+    def review_pages(
+        self, page: int, per_page: int, reviews_count: Optional[int]
+    ) -> int:
+        if page == 1:
+            return 1
+        if not per_page or reviews_count is None:
+            return self.review_pages_window
+        remaining = -(-reviews_count // per_page) - (page - 1)
+        return max(1, min(self.review_pages_window, remaining))
+
+    async def get_reviews(
+        self,
+        course_id: int,
+        known_ids: Set[int] = None,
+        reviews_count: int = None,
     ) -> List[Dict]:
-        batches = [
-            course_ids[i: i + batch_size]
-            for i in range(0, len(course_ids), batch_size)
-        ]
-        all_courses = []
-
-        for i, batch in enumerate(batches, 1):
-            params = "&".join([f"ids[]={cid}" for cid in batch])
-            url = f"{COURSES_API}?{params}"
+        if known_ids:
+            return await self.get_new_reviews(course_id, known_ids)
+
+        reviews = []
+        page = 1
+        per_page = 0
+        has_next = True
+
+        while has_next:
+            pages = range(
+                page,
+                page + self.review_pages(page, per_page, reviews_count),
+            )
+            results = await asyncio.gather(
+                *(self.fetch_reviews_page(course_id, p) for p in pages),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    self.record_failure("course-reviews", [course_id], result)
+                    self.incomplete_reviews.add(course_id)
+                    has_next = False
+                    break
+                page_reviews = result.get("course-reviews", [])
+                per_page = per_page or len(page_reviews)
+                reviews.extend(page_reviews)
+                has_next = result.get("meta", {}).get("has_next", False)
+                if not has_next:
+                    break
+            page += len(pages)
+
+        return reviews
+
+    async def get_new_reviews(
+        self, course_id: int, known_ids: Set[int]
+    ) -> List[Dict]:
+        reviews = []
+        page = 1
 
+        while True:
             try:
-                data = await self._fetch_json(url)
-                courses = data.get("courses", [])
-                all_courses.extend(courses)
-                print(f"Загружено {len(all_courses)}/{len(course_ids)} курсов")
-            except Exception:
-                pass
+                data = await self.fetch_reviews_page(course_id, page)
+            except RequestFailed as e:
+                self.record_failure("course-reviews", [course_id], e)
+                return reviews
 
-        return all_courses
+            page_reviews = data.get("course-reviews", [])
+            new_reviews = [r for r in page_reviews if r["id"] not in known_ids]
+            reviews.extend(new_reviews)
 
-    async def get_reviews(self, course_id: int) -> List[Dict]:
-        url = f"{REVIEWS_API}?course={course_id}"
-        try:
-            data = await self._fetch_json(url)
-            return data.get("course-reviews", [])
-        except Exception:
-            return []
+            if len(new_reviews) < len(page_reviews):
+                return reviews
+            if not data.get("meta", {}).get("has_next", False):
+                return reviews
+            page += 1
+
+    @sync_to_async
+    def get_known_review_ids(
+        self, course_ids: List[int]
+    ) -> Dict[int, Set[int]]:
+        known = {course_id: set() for course_id in course_ids}
+        for course_id, review_id in Review.objects.using(self.using).filter(
+            course__platform="stepik", course__external_id__in=course_ids
+        ).values_list("course__external_id", "external_id"):
+            known[course_id].add(review_id)
+        return known
 
     async def get_users(self, user_ids: List[int]) -> Dict:
         if not user_ids:
             return {}
+        return await self.fetch_by_ids(self.users_api, user_ids)
 
-        params = "&".join([f"ids[]={uid}" for uid in user_ids])
-        url = f"{USERS_API}?{params}"
+    async def process_course(
+        self,
+        course: Dict,
+        course_list_ids: Set[int],
+        known_review_ids: Set[int] = None,
+    ) -> Dict:
+        course_id = course.get("id")
 
-        try:
-            data = await self._fetch_json(url)
-            users = data.get("users", [])
-            return {user["id"]: user for user in users}
-        except Exception:
-            return {}
+        user_ids = set()
+        user_ids.update(course.get("authors", []))
+        user_ids.update(course.get("instructors", []))
 
-    @sync_to_async
-    def save_user_to_db(self, user_data: Dict) -> StepikUser:
-        user, created = StepikUser.objects.update_or_create(
-            external_id=user_data["id"],
-            defaults={
-                "full_name": user_data.get("full_name", ""),
-                "avatar": user_data.get("avatar", ""),
-                "bio": user_data.get("bio", ""),
-                "details": user_data,
-            },
+        reviews = await self.get_reviews(
+            course_id, known_review_ids, course.get("reviews_count")
         )
-        return user
 
-    @sync_to_async
-    def save_course_list_to_db(
-        self, list_data: Dict, category: Category = None
-    ) -> CourseList:
-        course_list, created = CourseList.objects.update_or_create(
-            external_id=list_data["id"],
-            defaults={
-                "title": list_data["title"],
-                "description": list_data.get("description", ""),
-                "category": category,
-            },
-        )
-        return course_list
+        for review in reviews:
+            if review.get("user"):
+                user_ids.add(review.get("user"))
+
+        users_info = await self.user_resolver.resolve(user_ids)
+
+        return {
+            "course": course,
+            "course_lists": course_list_ids,
+            "reviews": reviews,
+            "reviews_complete": not known_review_ids
+            and course_id not in self.incomplete_reviews,
+            "users": users_info,
+        }
 
     @sync_to_async
-    def save_course_to_db(self, course_data: Dict) -> Course:
-        cover = course_data.get("cover", "")
-        if not cover or cover == "None":
-            cover = ""
-
-        course, created = Course.objects.update_or_create(
-            external_id=course_data["id"],
-            defaults={
-                "title": course_data.get("title", ""),
-                "slug": course_data.get("slug", ""),
-                "description": course_data.get("description", ""),
-                "summary": course_data.get("summary", ""),
-                "cover": cover,
-                "is_paid": course_data.get("is_paid", False),
-                "price": course_data.get("price"),
-                "learners_count": course_data.get("learners_count", 0),
-                "time_to_complete": course_data.get("time_to_complete"),
-                "language": course_data.get("language", ""),
-                "is_active": course_data.get("is_active", True),
-                "is_public": course_data.get("is_public", True),
-                "is_featured": course_data.get("is_featured", False),
-                "reviews_count": course_data.get("reviews_count", 0),
-                "raw_data": course_data,
-                "platform": "stepik",
-            },
+    def get_stored_courses(self, course_ids: List[int]) -> Dict[int, Dict]:
+        return {
+            external_id: {
+                "reviews_count": reviews_count,
+                "update_date": update_date,
+                "authors": authors,
+                "instructors": instructors,
+            }
+            for (
+                external_id,
+                reviews_count,
+                update_date,
+                authors,
+                instructors,
+            ) in Course.objects.using(self.using)
+            .filter(
+                platform="stepik",
+                external_id__in=course_ids,
+                removed_at__isnull=True,
+            )
+            .values_list(
+                "external_id",
+                "reviews_count",
+                "raw_data__update_date",
+                "raw_data__authors",
+                "raw_data__instructors",
+            )
+        }
+
+    @staticmethod
+    def course_changed(course: Dict, stored: Optional[Dict]) -> bool:
+        if stored is None:
+            return True
+        if course.get("update_date") != stored["update_date"]:
+            return True
+        if course.get("reviews_count", 0) != stored["reviews_count"]:
+            return True
+        return any(
+            set(course.get(field) or []) != set(stored[field] or [])
+            for field in ("authors", "instructors")
         )
-        return course
 
-    @sync_to_async
-    def link_course_relations(
+    async def courses_stage(
         self,
-        course: Course,
-        course_lists: List[CourseList],
-        authors: List[StepikUser],
-        instructors: List[StepikUser],
-    ):
-        if course_lists:
-            course.course_lists.set(course_lists)
-        if authors:
-            course.authors.set(authors)
-        if instructors:
-            course.instructors.set(instructors)
+        course_ids: List[int],
+        course_queue: asyncio.Queue,
+        force_ids: Set[int],
+    ) -> None:
+        async for courses in self.get_course_details(course_ids):
+            batch_ids = [course["id"] for course in courses]
+            known_review_ids = {}
+            if self.incremental_reviews:
+                known_review_ids = await self.get_known_review_ids(batch_ids)
+            stored = {}
+            if self.delta:
+                stored = await self.get_stored_courses(batch_ids)
+
+            for course in courses:
+                changed = (
+                    not self.delta
+                    or course["id"] in force_ids
+                    or self.course_changed(course, stored.get(course["id"]))
+                )
+                await course_queue.put(
+                    (course, known_review_ids.get(course["id"]), changed)
+                )
 
-    @sync_to_async
-    def save_review_to_db(
-        self, review_data: Dict, course: Course, user: StepikUser = None
-    ) -> Review:
-        create_date = None
-        update_date = None
+        for _ in range(self.course_concurrency):
+            await course_queue.put(None)
 
-        if review_data.get("create_date"):
-            try:
-                create_date = datetime.fromisoformat(
-                    review_data["create_date"].replace("Z", "+00:00")
+    async def course_worker(
+        self,
+        course_queue: asyncio.Queue,
+        write_queue: asyncio.Queue,
+        list_ids_by_course: Dict[int, Set[int]],
+    ) -> None:
+        while True:
+            item = await course_queue.get()
+            if item is None:
+                return
+
+            course, known_review_ids, changed = item
+            course_id = course.get("id")
+            course_list_ids = list_ids_by_course.get(course_id, set())
+            if not changed:
+                self.unchanged_courses += 1
+                await write_queue.put(
+                    {
+                        "course": course,
+                        "course_lists": course_list_ids,
+                        "reviews": [],
+                        "users": {},
+                    }
                 )
-            except Exception as e:
-                print(e.__class__.__name__)
+                continue
 
-        if review_data.get("update_date"):
             try:
-                update_date = datetime.fromisoformat(
-                    review_data["update_date"].replace("Z", "+00:00")
+                record = await self.process_course(
+                    course, course_list_ids, known_review_ids
                 )
             except Exception as e:
-                print(e.__class__.__name__)
-
-        review, created = Review.objects.update_or_create(
-            external_id=review_data["id"],
-            defaults={
-                "course": course,
-                "user": user,
-                "score": review_data.get("score", 0),
-                "text": review_data.get("text", ""),
-                "create_date": create_date,
-                "update_date": update_date,
-                "raw_data": review_data,
-            },
-        )
-        return review
+                print(f"Ошибка при обработке курса {course_id}: {e}")
+                continue
+            await write_queue.put(record)
 
-    async def process_course(
-        self, course: Dict, course_list_obj: CourseList
+    async def reviews_stage(
+        self,
+        course_queue: asyncio.Queue,
+        write_queue: asyncio.Queue,
+        list_ids_by_course: Dict[int, Set[int]],
     ) -> None:
-        course_id = course.get("id")
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(self.course_concurrency):
+                tg.create_task(
+                    self.course_worker(
+                        course_queue, write_queue, list_ids_by_course
+                    )
+                )
 
-        user_ids = set()
-        user_ids.update(course.get("authors", []))
-        user_ids.update(course.get("instructors", []))
+        await write_queue.put(None)
+
+    async def start_phase(self, phase: str) -> None:
+        self.metrics.start_phase(phase)
+        await self.writer.set_phase(phase)
+
+    def report(self) -> Dict:
+        return self.metrics.report(
+            self.writer.db_timings(),
+            courses=self.writer.written,
+            rows_written=self.writer.rows_written,
+            unchanged_courses=self.unchanged_courses,
+            users_loaded=len(self.user_resolver.users),
+            failed_requests=len(self.failed_requests),
+            incomplete_fetches=self.incomplete_fetches,
+            concurrency=int(self.client.limiter.limit),
+            p95_ms=round(self.client.limiter.p95() * 1000, 1),
+            **{
+                f"removed_{name}": count
+                for name, count in self.removed.items()
+            },
+            **{
+                f"{platform}_courses": count
+                for platform, count in self.source_courses.items()
+            },
+        )
 
-        reviews = await self.get_reviews(course_id)
+    @sync_to_async
+    def load_failed_requests(self) -> tuple[List[int], Dict[str, Set[int]]]:
+        pks = []
+        ids_by_endpoint = {}
+        for failed in FailedRequest.objects.all():
+            pks.append(failed.pk)
+            ids_by_endpoint.setdefault(failed.endpoint, set()).update(
+                failed.ids
+            )
+        return pks, ids_by_endpoint
 
-        for review in reviews:
-            if review.get("user"):
-                user_ids.add(review.get("user"))
+    def save_failed_requests(
+        self, replayed_ids: List[int], completed: bool
+    ) -> None:
+        with transaction.atomic():
+            if completed:
+                FailedRequest.objects.filter(pk__in=replayed_ids).delete()
+            FailedRequest.objects.bulk_create(
+                [FailedRequest(**failed) for failed in self.failed_requests]
+            )
 
-        users_info = await self.get_users(list(user_ids))
+    async def discover(
+        self, writer: DBWriter, replay: Dict[str, Set[int]]
+    ) -> Optional[tuple[Dict, Dict[int, Set[int]], Set[int]]]:
+        await self.start_phase("categories")
+        course_list_ids, categories = await self.get_categories()
+        if not course_list_ids:
+            return None
+
+        print(f"Найдено {len(categories)} категорий")
+        course_list_ids = list(
+            set(course_list_ids) | replay.get("course-lists", set())
+        )
 
-        users_db = {}
-        for user_id, user_data in users_info.items():
-            user_obj = await self.save_user_to_db(user_data)
-            users_db[user_id] = user_obj
+        await self.start_phase("lists")
+        courses_by_lists = await self.get_course_lists(course_list_ids)
 
-        course_obj = await self.save_course_to_db(course)
+        category_by_list = {}
+        for cat_data in categories:
+            for list_id in cat_data.get("course_lists", []):
+                category_by_list.setdefault(list_id, cat_data["id"])
 
-        authors = [
-            users_db[uid]
-            for uid in course.get("authors", [])
-            if uid in users_db
-        ]
-        instructors = [
-            users_db[uid]
-            for uid in course.get("instructors", [])
-            if uid in users_db
-        ]
+        all_unique_course_ids = set()
+        list_ids_by_course = {}
+        for info in courses_by_lists.values():
+            info["category_id"] = category_by_list.get(info["id"])
+            all_unique_course_ids.update(info["course_ids"])
+            for cid in info["course_ids"]:
+                list_ids_by_course.setdefault(cid, set()).add(info["id"])
 
-        await self.link_course_relations(
-            course_obj, [course_list_obj], authors, instructors
+        await writer.write_catalog(
+            categories, list(courses_by_lists.values())
         )
+        return courses_by_lists, list_ids_by_course, all_unique_course_ids
 
-        for review in reviews:
-            user = users_db.get(review.get("user"))
-            await self.save_review_to_db(review, course_obj, user)
-
-    async def save_courses(
+    async def crawl(
         self,
-        courses: List[Dict],
-        list_name: str,
-        list_data: Dict,
-        category: Category,
-        processed_ids: set,
-    ) -> int:
-        new_courses = [c for c in courses if c.get("id") not in processed_ids]
-
-        if not new_courses:
-            print(f"\nПропущено: {list_name} (все курсы уже обработаны)")
-            return 0
-
-        print(
-            f"\nОбработка категории: {list_name} ({len(new_courses)} новых из {len(courses)})" # noqa
-        )
+        writer: DBWriter,
+        course_ids: Iterable[int],
+        list_ids_by_course: Dict[int, Set[int]],
+        force_ids: Set[int],
+    ) -> bool:
+        course_queue = asyncio.Queue(maxsize=self.queue_size)
+        write_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        cancelled = False
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(
+                    self.courses_stage(
+                        list(course_ids), course_queue, force_ids
+                    )
+                )
+                tg.create_task(
+                    self.reviews_stage(
+                        course_queue, write_queue, list_ids_by_course
+                    )
+                )
+                tg.create_task(writer.run(write_queue))
+        except* CrawlCancelled:
+            print("Запуск остановлен по запросу отмены")
+            cancelled = True
+        return cancelled
 
-        course_list_obj = await self.save_course_list_to_db(
-            list_data, category
+    async def crawl_sharded(
+        self,
+        writer: DBWriter,
+        course_ids: Iterable[int],
+        list_ids_by_course: Dict[int, Set[int]],
+        force_ids: Set[int],
+    ) -> bool:
+        run = writer.checkpointer.run
+        total = await writer.submit(
+            enqueue_tasks,
+            run,
+            course_ids,
+            list_ids_by_course,
+            force_ids,
+            self.task_size,
         )
+        print(f"Задач в очереди: {total}, обработчиков: {self.workers}")
 
-        for i, course in enumerate(new_courses, 1):
-            course_id = course.get("id")
-            try:
-                await self.process_course(course, course_list_obj)
-                processed_ids.add(course_id)
-
-                if i % 10 == 0 or i == len(new_courses):
-                    print(
-                        f"{list_name}: {i}/{len(new_courses)} курсов обработано" # noqa
+        processes = [
+            await spawn_worker(run.pk, self.worker_options)
+            for _ in range(self.workers)
+        ]
+        try:
+            while True:
+                await asyncio.sleep(self.poll_interval)
+                counts = await writer.submit(task_counts, run)
+                print(
+                    f"Задачи: выполнено {counts['done']}/{total}, "
+                    f"в работе {counts['leased']}, ошибок {counts['failed']}"
+                )
+                if await writer.submit(writer.checkpointer.check_cancelled):
+                    print("Запуск остановлен по запросу отмены")
+                    return True
+                if not counts["pending"] and not counts["leased"]:
+                    break
+                if processes and all(
+                    process.returncode is not None for process in processes
+                ):
+                    raise RuntimeError(
+                        "Обработчики завершились, не выполнив все задачи"
                     )
-            except Exception as e:
-                print(f"Ошибка при обработке курса {course_id}: {e}")
-
-        print(f"Завершено: {list_name}")
-        return len(new_courses)
+        finally:
+            for process in processes:
+                await process.wait()
 
-    @sync_to_async
-    def save_category_to_db(self, category_data: Dict) -> Category:
-        category, created = Category.objects.update_or_create(
-            external_id=category_data["id"],
-            defaults={
-                "title": category_data.get("title", ""),
-            },
+        writer.written = await writer.submit(run.checkpoints.count)
+        self.incomplete_fetches += await writer.submit(
+            incomplete_fetches, run
         )
-        return category
-
-    async def parse(self):
-        connector = aiohttp.TCPConnector(limit=50)
-        timeout = aiohttp.ClientTimeout(total=60)
+        if counts["failed"]:
+            raise RuntimeError(f"Не выполнено задач: {counts['failed']}")
+        return False
 
-        async with aiohttp.ClientSession(
-            connector=connector, timeout=timeout
-        ) as session:
-            self.session = session
-            self.semaphore = asyncio.Semaphore(self.max_concurrent)
-
-            course_list_ids, categories = await self.get_categories()
-            if not course_list_ids:
-                return None, None
-
-            print(f"Найдено {len(categories)} категорий")
-
-            categories_db = {}
-            for cat_data in categories:
-                cat_obj = await self.save_category_to_db(cat_data)
-                categories_db[cat_data["id"]] = cat_obj
-
-            courses_by_lists = await self.get_course_lists(course_list_ids)
+    async def crawl_source(
+        self, source: SourceAdapter, writer: DBWriter
+    ) -> None:
+        source.bind(self.client)
+        seen = set()
+        try:
+            async for stubs in source.discover():
+                courses = [
+                    source.normalize_course(course_data)
+                    for course_data in await source.fetch_courses(stubs)
+                ]
+                await writer.write_courses(courses)
+                seen.update(course.external_id for course in courses)
+        except Exception as e:
+            print(f"Источник {source.platform}: ошибка {e}")
+            source.failed += 1
+        self.source_courses[source.platform] = len(seen)
+        print(f"Источник {source.platform}: загружено курсов {len(seen)}")
+
+        if not self.reconcile:
+            return
+        if source.failed:
+            print(
+                f"Сверка {source.platform} пропущена: "
+                f"неудачных запросов {source.failed}"
+            )
+            return
+        try:
+            removed = await writer.submit(
+                reconcile_source,
+                source.platform,
+                seen,
+                self.max_removed_ratio,
+                self.chunk_size,
+                self.using,
+            )
+        except ReconcileRefused as e:
+            print(f"Сверка {source.platform} пропущена: {e}")
+            return
+        self.removed[f"{source.platform}_courses"] = removed
+        if removed:
+            print(f"Удалено на {source.platform}: курсов {removed}")
+
+    async def reconcile_catalog(
+        self, writer: DBWriter, course_ids: Set[int], courses_by_lists: Dict
+    ) -> None:
+        await self.start_phase("reconcile")
+        if self.replay_misses():
+            print(
+                "Сверка с каталогом пропущена: кэш неполный, промахов "
+                f"{self.replay_misses()}"
+            )
+            return
+        try:
+            removed = await writer.submit(
+                reconcile,
+                writer.checkpointer.run,
+                course_ids,
+                [info["id"] for info in courses_by_lists.values()],
+                len(self.failed_requests),
+                self.incomplete_fetches,
+                self.max_removed_ratio,
+                self.chunk_size,
+                self.using,
+            )
+        except ReconcileRefused as e:
+            print(f"Сверка с каталогом пропущена: {e}")
+            return
+        self.removed.update(removed)
+        print(
+            f"Удалено на Stepik: курсов {removed['courses']}, "
+            f"подкатегорий {removed['course_lists']}, "
+            f"отзывов {removed['reviews']}"
+        )
 
-            all_unique_course_ids = set()
-            for info in courses_by_lists.values():
-                all_unique_course_ids.update(info["course_ids"])
+    def replay_misses(self) -> int:
+        return self.client.cache.misses if self.replay else 0
+
+    def make_client(self) -> StepikClient:
+        return StepikClient(
+            self.max_concurrent,
+            self.max_concurrent_limit,
+            max_retries=self.max_retries,
+            backoff_base=self.backoff_base,
+            backoff_max=self.backoff_max,
+            cache=self.cache,
+            replay=self.replay,
+            metrics=self.metrics,
+            rate_limit=self.rate_limit,
+        )
 
-            print(f"Уникальных курсов: {len(all_unique_course_ids)}\n")
+    async def parse(self, course_ids: Iterable[int] = None):
+        async with self.make_client() as client:
+            self.client = client
+            self.user_resolver = UserResolver(
+                self.get_users, self.user_ttl, using=self.using
+            )
 
-            course_details = await self.get_course_details(
-                list(all_unique_course_ids)
+            writer = DBWriter(
+                self.write_batch_size,
+                self.chunk_size,
+                self.using,
+                self.text_workers,
             )
-            print(f"\nПолучено деталей: {len(course_details)} курсов")
+            self.writer = writer
+            replayed_ids = []
+            source_tasks = []
+            status = "failed"
+            try:
+                checkpointer = await writer.start_run(
+                    self.resume,
+                    self.run_id,
+                    "full" if course_ids is None else "refresh",
+                )
 
-            course_by_id = {c["id"]: c for c in course_details}
+                if course_ids is None:
+                    source_tasks = [
+                        asyncio.create_task(self.crawl_source(source, writer))
+                        for source in self.sources
+                    ]
+
+                replay = {}
+                if course_ids is None:
+                    replayed_ids, replay = await self.load_failed_requests()
+                if replayed_ids:
+                    print(f"Повтор неудачных запросов: {len(replayed_ids)}")
+
+                if course_ids is None:
+                    discovered = await self.discover(writer, replay)
+                    if discovered is None:
+                        return None, None
+                    (
+                        courses_by_lists,
+                        list_ids_by_course,
+                        all_unique_course_ids,
+                    ) = discovered
+                else:
+                    courses_by_lists = {}
+                    list_ids_by_course = {}
+                    all_unique_course_ids = set(course_ids)
+
+                all_unique_course_ids.update(replay.get("courses", set()))
+                all_unique_course_ids.update(
+                    replay.get("course-reviews", set())
+                )
 
-            processed_course_ids = set()
-            total_processed = 0
+                print(f"Уникальных курсов: {len(all_unique_course_ids)}\n")
+                pending_ids = checkpointer.plan(
+                    all_unique_course_ids, list_ids_by_course
+                )
+                if len(pending_ids) < len(all_unique_course_ids):
+                    print(f"Осталось обработать курсов: {len(pending_ids)}")
 
-            for list_name, info in courses_by_lists.items():
-                category = None
-                for cat_data in categories:
-                    if info["id"] in cat_data.get("course_lists", []):
-                        category = categories_db[cat_data["id"]]
-                        break
+                fresh_users = await self.user_resolver.load_fresh()
+                print(f"Пользователей не требуют обновления: {fresh_users}")
 
-                category_courses = [
-                    course_by_id[cid]
-                    for cid in info["course_ids"]
-                    if cid in course_by_id
-                ]
-                if category_courses:
-                    processed = await self.save_courses(
-                        category_courses,
-                        list_name,
-                        info,
-                        category,
-                        processed_course_ids,
+                if replay.get("users"):
+                    await writer.write_users(
+                        await self.get_users(list(replay["users"]))
+                    )
+
+                await self.start_phase("courses")
+                if self.workers is not None:
+                    cancelled = await self.crawl_sharded(
+                        writer,
+                        pending_ids,
+                        list_ids_by_course,
+                        replay.get("course-reviews", set()),
+                    )
+                else:
+                    cancelled = await self.crawl(
+                        writer,
+                        pending_ids,
+                        list_ids_by_course,
+                        replay.get("course-reviews", set()),
+                    )
+                await asyncio.gather(*source_tasks)
+                linked = await writer.submit(link_review_users, self.using)
+                if linked:
+                    print(f"Отзывов привязано к пользователям: {linked}")
+                if not cancelled and self.reconcile:
+                    await self.reconcile_catalog(
+                        writer, all_unique_course_ids, courses_by_lists
+                    )
+                status = "cancelled" if cancelled else "finished"
+            except asyncio.CancelledError:
+                status = "interrupted"
+                raise
+            finally:
+                for task in source_tasks:
+                    task.cancel()
+                await asyncio.gather(*source_tasks, return_exceptions=True)
+                self.metrics.end_phase()
+                if writer.checkpointer is not None:
+                    writer.defer(
+                        writer.checkpointer.finish,
+                        status,
+                        self.report(),
+                        not (self.keep_lock and status == "finished"),
                     )
-                    total_processed += processed
+                writer.defer(
+                    self.save_failed_requests,
+                    replayed_ids,
+                    status == "finished",
+                )
+                writer.close()
 
             print(f"\n{'='*60}")
-            print(f"Всего обработано уникальных курсов: {total_processed}")
+            print(
+                f"Всего обработано уникальных курсов: {writer.written}"
+            )
+            print(
+                f"Запросов пользователей: {self.user_resolver.requests}, "
+                f"загружено: {len(self.user_resolver.users)}"
+            )
+            if self.delta:
+                print(
+                    f"Курсов без изменений (без отзывов и пользователей): "
+                    f"{self.unchanged_courses}"
+                )
+            print(f"Запросы: {client.summary()}")
+            print(
+                "Этапы: "
+                + ", ".join(
+                    f"{phase} {seconds:.1f} с"
+                    for phase, seconds in self.metrics.phases.items()
+                )
+            )
+            print(
+                "Время записи в БД: "
+                + ", ".join(
+                    f"{name} {seconds:.2f} с"
+                    for name, seconds in writer.db_timings().items()
+                )
+            )
+            print(
+                f"{client.limiter.summary()}, изменений лимита: "
+                f"{len(client.limiter.history) - 1}"
+            )
+            if self.failed_requests:
+                print(
+                    f"Неудачных запросов сохранено для повтора: "
+                    f"{len(self.failed_requests)}"
+                )
 
             return courses_by_lists, all_unique_course_ids
 
 
 async def main():
-    parser = StepikParser(max_concurrent=7)
+    parser = StepikParser()
     courses_data, course_ids = await parser.parse()
     return courses_data, course_ids
 
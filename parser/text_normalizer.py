@@ -0,0 +1,101 @@
+from html.parser import HTMLParser
+import re
+from typing import List, Optional, Tuple
+
+BLOCK_TAGS = {
+    "address",
+    "article",
+    "blockquote",
+    "br",
+    "div",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "hr",
+    "li",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "td",
+    "th",
+    "tr",
+    "ul",
+}
+SKIP_TAGS = {"script", "style", "template"}
+WHITESPACE = re.compile(r"\s+")
+SNIPPET_LENGTH = 200
+
+
+class TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skipping += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skipping = max(0, self.skipping - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def collapse_whitespace(text: str) -> str:
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def html_to_text(html: Optional[str]) -> str:
+    if not html:
+        return ""
+    if "<" not in html and "&" not in html:
+        return collapse_whitespace(html)
+    extractor = TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return collapse_whitespace("".join(extractor.parts))
+
+
+def normalize_search(text: str) -> str:
+    return collapse_whitespace(text).casefold().replace("ё", "е")
+
+
+def make_snippet(text: str, length: int = SNIPPET_LENGTH) -> str:
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(" ", 1)[0] or text[:length]
+    return cut.rstrip(" ,.;:-") + "…"
+
+
+def course_text(
+    title: str, summary: str, description: str
+) -> Tuple[str, str]:
+    summary = html_to_text(summary)
+    description = html_to_text(description)
+    return (
+        normalize_search(
+            " ".join(filter(None, [title, summary, description]))
+        ),
+        make_snippet(summary or description),
+    )
+
+
+def course_texts(items: List[Tuple[str, str, str]]) -> List[Tuple[str, str]]:
+    return [course_text(*item) for item in items]
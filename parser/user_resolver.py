@@ -0,0 +1,96 @@
+import asyncio
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from parser.models import StepikUser
+
+
+class UserResolver:
+    def __init__(
+        self,
+        fetch_users: Callable[[List[int]], Awaitable[Dict]],
+        ttl: timedelta = timedelta(hours=24),
+        batch_size: int = 100,
+        delay: float = 0.05,
+        using: str = "default",
+    ):
+        self.fetch_users = fetch_users
+        self.using = using
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.delay = delay
+        self.users = {}
+        self.missing_ids = set()
+        self.fresh_ids = set()
+        self.pending = {}
+        self.queue = []
+        self.timer = None
+        self.tasks = set()
+        self.requests = 0
+
+    @sync_to_async
+    def load_fresh(self) -> int:
+        self.fresh_ids = set(
+            StepikUser.objects.using(self.using).filter(
+                fetched_at__gte=timezone.now() - self.ttl
+            ).values_list("external_id", flat=True)
+        )
+        return len(self.fresh_ids)
+
+    async def resolve(self, user_ids: Iterable[int]) -> Dict[int, Dict]:
+        user_ids = set(user_ids) - self.fresh_ids - self.missing_ids
+        loop = asyncio.get_running_loop()
+
+        futures = []
+        for user_id in user_ids:
+            if user_id in self.users:
+                continue
+            future = self.pending.get(user_id)
+            if future is None:
+                future = loop.create_future()
+                self.pending[user_id] = future
+                self.queue.append(user_id)
+            futures.append(future)
+
+        if len(self.queue) >= self.batch_size:
+            self._dispatch(full_only=True)
+        if self.queue and self.timer is None:
+            self.timer = loop.call_later(self.delay, self._dispatch)
+
+        if futures:
+            await asyncio.gather(*futures)
+
+        return {
+            user_id: self.users[user_id]
+            for user_id in user_ids
+            if user_id in self.users
+        }
+
+    def _dispatch(self, full_only: bool = False) -> None:
+        if not full_only and self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        while self.queue:
+            if full_only and len(self.queue) < self.batch_size:
+                break
+            batch = self.queue[: self.batch_size]
+            self.queue = self.queue[self.batch_size:]
+            task = asyncio.create_task(self._fetch_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _fetch_batch(self, user_ids: List[int]) -> None:
+        self.requests += 1
+        try:
+            self.users.update(await self.fetch_users(user_ids))
+        finally:
+            for user_id in user_ids:
+                if user_id not in self.users:
+                    self.missing_ids.add(user_id)
+                future = self.pending.pop(user_id)
+                if not future.done():
+                    future.set_result(None)
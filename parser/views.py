@@ -1,6 +1,7 @@
 from django.views.generic import ListView, DetailView, TemplateView
 from django.db.models import Avg, Count, Q, Max
 from parser.models import Course, Category, Review
+from parser.text_normalizer import normalize_search
 
 
 class MainPageView(ListView):
@@ -11,7 +12,7 @@ class MainPageView(ListView):
 
     def get_queryset(self):
         queryset = (
-            Course.objects.filter(is_active=True, is_public=True)
+            Course.objects.active()
             .with_rating()
             .select_related()
             .prefetch_related("course_lists", "authors", "instructors")
@@ -20,9 +21,7 @@ class MainPageView(ListView):
         search_query = self.request.GET.get("search", "").strip()
         if search_query:
             queryset = queryset.filter(
-                Q(title__icontains=search_query)
-                | Q(description__icontains=search_query)
-                | Q(summary__icontains=search_query)
+                search_text__contains=normalize_search(search_query)
             )
 
         platform = self.request.GET.get("platform", "")
@@ -50,13 +49,11 @@ class MainPageView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        context["total_courses"] = Course.objects.filter(
-            is_active=True, is_public=True
-        ).count()
+        context["total_courses"] = Course.objects.active().count()
 
-        context["stepik_courses"] = Course.objects.filter(
-            is_active=True, is_public=True, platform="stepik"
-        ).count()
+        context["stepik_courses"] = (
+            Course.objects.active().filter(platform="stepik").count()
+        )
 
         context["other_courses"] = (
             context["total_courses"] - context["stepik_courses"]
@@ -78,7 +75,7 @@ class CourseDetailView(DetailView):
 
     def get_queryset(self):
         return (
-            Course.objects.filter(is_active=True, is_public=True)
+            Course.objects.active()
             .with_rating()
             .prefetch_related(
                 "course_lists__category",
@@ -92,12 +89,13 @@ class CourseDetailView(DetailView):
         context = super().get_context_data(**kwargs)
         course = self.object
 
-        reviews = course.reviews.select_related("user").order_by(
+        present_reviews = course.reviews.filter(removed_at__isnull=True)
+        reviews = present_reviews.select_related("user").order_by(
             "-create_date"
         )[:10]
         context["reviews"] = reviews
 
-        reviews_stats = course.reviews.aggregate(
+        reviews_stats = present_reviews.aggregate(
             total=Count("id"),
             score_5=Count("id", filter=Q(score=5)),
             score_4=Count("id", filter=Q(score=4)),
@@ -108,11 +106,8 @@ class CourseDetailView(DetailView):
         context["reviews_stats"] = reviews_stats
 
         similar_courses = (
-            Course.objects.filter(
-                is_active=True,
-                is_public=True,
-                course_lists__in=course.course_lists.all(),
-            )
+            Course.objects.active()
+            .filter(course_lists__in=course.course_lists.all())
             .exclude(id=course.id)
             .with_rating()
             .distinct()[:3]
@@ -128,7 +123,7 @@ class StatsView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        courses = Course.objects.filter(is_active=True, is_public=True)
+        courses = Course.objects.active()
 
         context["total_courses"] = courses.count()
 
@@ -140,7 +135,9 @@ class StatsView(TemplateView):
         max_students = courses.aggregate(max=Max("learners_count"))["max"] or 0
         context["max_students"] = max_students
 
-        context["total_reviews"] = Review.objects.count()
+        context["total_reviews"] = Review.objects.filter(
+            removed_at__isnull=True
+        ).count()
 
         lang_stats = (
             courses.values("language")
@@ -228,8 +225,10 @@ class StatsView(TemplateView):
                 course_count=Count(
                     "course_lists__courses",
                     filter=Q(
+                        course_lists__removed_at__isnull=True,
                         course_lists__courses__is_active=True,
                         course_lists__courses__is_public=True,
+                        course_lists__courses__removed_at__isnull=True,
                     ),
                     distinct=True,
                 )